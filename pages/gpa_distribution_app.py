@@ -1,33 +1,27 @@
 import streamlit as st
 import pandas as pd
-import os
 import matplotlib.pyplot as plt
-import seaborn as sns
 from pages.templates.menu import navigation_menu, credits
+from pages.templates.dataset import pin_dataset_version, data_dir
+from pages.templates.gpa_stats import GPA_GROUPS, list_report_files, extract_gpa_midpoint, load_histogram, gpa_summary, hypothesis_tests, warm_file
+from pages.templates.prefetch import prefetch_neighbours
+from pages.templates.gpa_views import (term_trend_view, college_comparison_view, percentile_widget,
+                                       term_cumulative_view)
+from pages.templates.export import download_export, gpa_table_chunks
 
 navigation_menu()
 
-DATA_DIR = "csv_data/gpaDistribution"
+REPORT = "gpaDistribution"
 
 @st.cache_data
-def load_file_info(data_dir):
+def load_file_info(data_dir, dataset_version):
     with st.spinner('Loading data...'):
-        file_list = [f for f in os.listdir(data_dir) if f.endswith('.csv')]
-        file_info = []
-        for file in file_list:
-            parts = file.replace(".csv", "").split("_")
-            year, semester, college_name = parts[0], parts[1], " ".join(parts[2:])
-            file_info.append({"year": year, "semester": semester, "college": college_name, "file_path": os.path.join(data_dir, file)})
-        
-        return file_info
+        return list_report_files(data_dir)
 
-def load_data(file_path):
+def load_data(file_path, dataset_version):
     with st.spinner("Loading data...", show_time=True):
         try:
-            data = pd.read_csv(file_path)
-            data = data.set_index(pd.Index(data["GPA Group"]))
-            data.drop(columns=["GPA Group"], inplace=True)
-            return data
+            return load_histogram(file_path, dataset_version)
         except FileNotFoundError:
             st.error(f"File not found: {file_path}")
             st.stop()
@@ -39,13 +33,6 @@ def load_data(file_path):
             st.stop()
         
 
-def extract_gpa_midpoint(gpa_group):
-    if gpa_group == '4.000':
-        return 4.0
-    else:
-        lower, upper = gpa_group.split('-')
-        return (float(lower) + float(upper)) / 2
-
 def calculate_weighted_average_gpa(row, gender):
     weighted_sum = 0
     total_students = 0
@@ -84,28 +71,29 @@ def descriptive_statistics(data):
     else:
         st.write("**Ratio (Men:Women):** Undefined (no women in data)")
     
-def hypothesis_testing(data):
+def hypothesis_testing(tests):
     st.write("## 2. Hypothesis Testing")
     st.write("#### 2.1. GPA Across Class Levels")
 
-    # Expand the data so that each student is represented by a single row
-    student_rows = []
-    for idx, row in data.iterrows():
-        gpa_val = row['GPA Midpoint']
-        for level in ['Freshman', 'Sophomore', 'Junior', 'Senior']:
-            count_val = row[f'{level} Total']
-            for _ in range(int(count_val)):
-                student_rows.append({'Class Level': level, 'GPA': gpa_val})
-
-
-    expanded_df = pd.DataFrame(student_rows)
-
     st.write("##### Box Plot: GPA Distribution by Class Level")
     fig_box, ax_box = plt.subplots(figsize=(10, 6))
-    sns.boxplot(x='Class Level', y='GPA', data=expanded_df, ax=ax_box)
+    ax_box.bxp(tests["box_stats"], showmeans=False, patch_artist=True,
+               boxprops={"facecolor": "#8fb0d9"}, medianprops={"color": "black"})
+    ax_box.set_xlabel("Class Level")
+    ax_box.set_ylabel("GPA")
     ax_box.set_title("GPA Distribution by Class Level")
     st.pyplot(fig_box)
 
+    results = tests["results"]
+    st.write("##### Tests Across Class Levels")
+    st.dataframe(results.iloc[[0, 1, 3]].style.format(
+        {"Statistic": "{:.3f}", "p-value": "{:.3g}", "Effect Size": "{:.4f}"}))
+    st.write("#### 2.2. GPA Between Genders")
+    st.dataframe(results.iloc[[2, 4]].style.format(
+        {"Statistic": "{:.3f}", "p-value": "{:.3g}", "Effect Size": "{:.4f}"}))
+    st.caption("Tests use the midpoint of each GPA group and are computed directly on the student counts. "
+               "A p-value below 0.05 indicates a significant difference; the effect size shows how large it is.")
+
 def trend_pattern_analysis(data):
     st.write("## 3. Trend/Pattern Analysis")
     st.write("#### 3.1. Patterns across different GPA ranges and class years")
@@ -119,7 +107,7 @@ def trend_pattern_analysis(data):
     ax_line.legend()
     st.pyplot(fig_line)
     
-def gender_based_analysis(data):
+def gender_based_analysis(data, summary):
     st.write("## 4. Gender-Based GPA Analysis")
 
     # Stacked Bar Plot: Gender Distribution across GPA Groups
@@ -151,52 +139,7 @@ def gender_based_analysis(data):
     st.write("#### 4.2. Comparison of average GPA between genders across class levels")
     class_levels = ['Freshman', 'Sophomore', 'Junior', 'Senior']
     
-    # Calculate GPA values for overall GPA distribution statistics
-    gpa_values = []
-    for index, row in data.iterrows():
-        gpa = row['GPA Midpoint']
-        total_students_in_range = row[['Freshman Male', 'Sophomore Male', 'Junior Male', 'Senior Male',
-                                        'Freshman Female', 'Sophomore Female', 'Junior Female', 'Senior Female']].sum()
-        gpa_values.extend([gpa] * int(total_students_in_range))
-
-    gpa_series = pd.Series(gpa_values)
-
-    summary_data = []
-
-    for class_level in class_levels:
-        total_male_students = data[f'{class_level} Male'].sum()
-        total_female_students = data[f'{class_level} Female'].sum()
-        total_students = total_male_students + total_female_students
-        
-        # Calculate weighted GPA for male and female students
-        male_weighted_gpa = (data['GPA Midpoint'] * data[f'{class_level} Male']).sum()
-        female_weighted_gpa = (data['GPA Midpoint'] * data[f'{class_level} Female']).sum()
-        
-        # Calculate average GPA for male and female students
-        average_male_gpa = male_weighted_gpa / total_male_students if total_male_students > 0 else 0
-        average_female_gpa = female_weighted_gpa / total_female_students if total_female_students > 0 else 0
-        average_total_gpa = (male_weighted_gpa + female_weighted_gpa) / total_students if total_students > 0 else 0
-        
-        summary_data.append([average_male_gpa, average_female_gpa, average_total_gpa])
-
-    # Calculate totals across all class levels
-    total_male_students = data[['Freshman Male', 'Sophomore Male', 'Junior Male', 'Senior Male']].sum().sum()
-    total_female_students = data[['Freshman Female', 'Sophomore Female', 'Junior Female', 'Senior Female']].sum().sum()
-    total_students = total_male_students + total_female_students
-
-    # Calculate weighted GPA for all students
-    total_male_gpa = (data['GPA Midpoint'] * data[['Freshman Male', 'Sophomore Male', 'Junior Male', 'Senior Male']].sum(axis=1)).sum()
-    total_female_gpa = (data['GPA Midpoint'] * data[['Freshman Female', 'Sophomore Female', 'Junior Female', 'Senior Female']].sum(axis=1)).sum()
-    total_gpa = total_male_gpa + total_female_gpa
-
-    # Calculate average GPA for all students
-    average_male_gpa = total_male_gpa / total_male_students if total_male_students > 0 else 0
-    average_female_gpa = total_female_gpa / total_female_students if total_female_students > 0 else 0
-    average_total_gpa = total_gpa / total_students if total_students > 0 else 0
-    summary_data.append([average_male_gpa, average_female_gpa, average_total_gpa])
-
-    # Create DataFrame for summary data
-    summary_df = pd.DataFrame(summary_data, index=class_levels + ['Total'], columns=['Male', 'Female', 'Total'])
+    summary_df = summary["gender_gpa"]
     
     st.dataframe(summary_df)
 
@@ -216,27 +159,17 @@ def gender_based_analysis(data):
     st.pyplot(fig)
 
 
-def gpa_class_level_statistics(data):
+def gpa_class_level_statistics(summary):
     st.write("## 6. Overall GPA Distribution Statistics")
 
-    # Collect GPA values for overall GPA distribution statistics
-    gpa_values = []
-    for index, row in data.iterrows():
-        gpa = row['GPA Midpoint']
-        total_students_in_range = row[['Freshman Male', 'Sophomore Male', 'Junior Male', 'Senior Male',
-                                        'Freshman Female', 'Sophomore Female', 'Junior Female', 'Senior Female']].sum()
-        gpa_values.extend([gpa] * int(total_students_in_range))
+    # Statistics are computed from the GPA Group counts, without expanding every student
+    median_gpa = summary["median_gpa"]
+    q1_gpa = summary["q1_gpa"]
+    q3_gpa = summary["q3_gpa"]
 
-    gpa_series = pd.Series(gpa_values)
-
-    # Calculate GPA distribution statistics
-    median_gpa = gpa_series.median()
-    q1_gpa = gpa_series.quantile(0.25)
-    q3_gpa = gpa_series.quantile(0.75)
-
-    percent_above_b = (gpa_series >= 3.0).sum() / len(gpa_series) * 100 if len(gpa_series) > 0 else 0
-    percent_above_c = (gpa_series >= 2.0).sum() / len(gpa_series) * 100 if len(gpa_series) > 0 else 0
-    percent_above_d = (gpa_series >= 1.0).sum() / len(gpa_series) * 100 if len(gpa_series) > 0 else 0
+    percent_above_b = summary["percent_above_b"]
+    percent_above_c = summary["percent_above_c"]
+    percent_above_d = summary["percent_above_d"]
 
 
     st.write(f"**Median GPA:** {median_gpa:.2f}")
@@ -250,11 +183,33 @@ def main():
     st.title("📊 College GPA Data Explorer")
     st.sidebar.header("Select College, Year, and Semester")
 
-    file_info = load_file_info(DATA_DIR)
+    dataset_version = pin_dataset_version()
+    file_info = load_file_info(data_dir(REPORT, dataset_version), dataset_version)
     years = sorted(set([info["year"] for info in file_info]))
     semesters = sorted(set([info["semester"] for info in file_info]))
     colleges = sorted(set([info["college"] for info in file_info]))
 
+    view = st.sidebar.radio("View:", ["Single Term", "Trend Across Terms", "Compare Colleges", "Term vs Cumulative"])
+    if view == "Term vs Cumulative":
+        selected_college = st.sidebar.selectbox("Choose College:", colleges)
+        term_cumulative_view(selected_college, dataset_version)
+        return
+    if view == "Trend Across Terms":
+        selected_college = st.sidebar.selectbox("Choose College:", colleges)
+        term_trend_view(file_info, selected_college, dataset_version)
+        return
+    if view == "Compare Colleges":
+        selected_year = st.sidebar.selectbox("Choose Year:", years)
+        selected_semester = st.sidebar.selectbox("Choose Semester:", semesters)
+        term_colleges = sorted(set(info["college"] for info in file_info
+                                   if info["year"] == selected_year and info["semester"] == selected_semester))
+        if st.sidebar.checkbox("All Colleges", value=True):
+            selected_colleges = term_colleges
+        else:
+            selected_colleges = st.sidebar.multiselect("Choose Colleges:", term_colleges, default=term_colleges[:2])
+        college_comparison_view(file_info, selected_year, selected_semester, selected_colleges, dataset_version)
+        return
+
     selected_year = st.sidebar.selectbox("Choose Year:", years)
     selected_semester = st.sidebar.selectbox("Choose Semester:", semesters)
     selected_college = st.sidebar.selectbox("Choose College:", colleges)
@@ -263,7 +218,7 @@ def main():
 
     if selected_file_info:
         file_path = selected_file_info["file_path"]
-        data = load_data(file_path)
+        data = load_data(file_path, dataset_version)
         
         data['GPA Midpoint'] = data.index.to_series().apply(extract_gpa_midpoint)
         
@@ -272,10 +227,20 @@ def main():
 
 
         descriptive_statistics(data)
-        hypothesis_testing(data)
+        hypothesis_testing(hypothesis_tests(file_path, dataset_version))
         trend_pattern_analysis(data)
-        gender_based_analysis(data)
-        gpa_class_level_statistics(data)
+        summary = gpa_summary(file_path, dataset_version)
+        gender_based_analysis(data, summary)
+        gpa_class_level_statistics(summary)
+        percentile_widget(REPORT, selected_file_info, dataset_version)
+
+        st.write("## 8. Download GPA Tables")
+        st.write("Every college and term in one long table, one row per GPA group.")
+        download_export("GPA Tables", lambda: gpa_table_chunks(file_info), f"{REPORT}_all_terms", "gpa_export",
+                        (dataset_version, REPORT), len(file_info) * len(GPA_GROUPS),
+                        api_export=("gpa", {"report": REPORT}))
+
+        prefetch_neighbours(file_info, selected_year, selected_semester, selected_college, dataset_version, warm_file)
     else:
         st.write("⚠️ No matching data found for the selected combination. Please choose different filters.")
 if __name__ == "__main__":
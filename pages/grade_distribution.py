@@ -1,42 +1,44 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 from pages.templates.menu import navigation_menu, credits
+from pages.templates.dataset import pin_dataset_version
+from pages.templates.grade_data import (load_grade_data, narrow_positions, instructor_gpa_rollup, grade_data_path,
+                                        summer_mask, sort_positions)
+from pages.templates.instructor_index import load_instructor_index
+from pages.templates.memory import memory_accounting
+from pages.templates.export import download_export, row_chunks
 import datetime, time
 import streamlit as st
 import plotly.express as px
+import math
 
+OTHERS_LABEL = "Others"
+DEFAULT_TOP_N = 15
+WEBGL_TRACE_THRESHOLD = 20
+PLOT_COLUMNS = ['instructor', 'year', 'term', 'gpa', 'course']
+SORT_COLUMNS = {"Year & Term": None, "Average GPA": "gpa", "Instructor": "instructor", "Course": "course",
+                "Total Students": "final_total"}
+PAGE_SIZES = [25, 50, 100, 250]
 
 
-@st.cache_data
-def load_data(file_path):
-    return pd.read_csv(file_path)
-
-@st.cache_data
-def filter_dataframe(df, exclude_summer, course_title_search, course_id_search):
-    if exclude_summer:
-        df = df[~df['term'].str.contains('Summer', case=False, na=False)]
-
-    if course_title_search:
-        df = df[df["course"].fillna('').str.contains(course_title_search, case=False)]
-
-    if course_id_search:
-        df = df[df["course"].fillna('').str.contains(course_id_search, case=False)]
-            
-    return df
-
-
-def process_dataframe(df):
-    df = df.sort_values(by=['year', 'term', 'instructor'], ascending=[False, False, True])
+def process_dataframe(df, positions):
     columns = ['instructor', 'year', 'term', 'gpa'] + [col for col in df.columns if
                                                         col not in ['instructor', 'year', 'term', 'gpa']]
-    df = df[columns]
+    df = df.iloc[positions, [df.columns.get_loc(col) for col in columns]]
     return df
 
-def create_gpa_plot(df):
+def create_gpa_plot(df, group_by='instructor', label='Instructor', top_n=None):
     df = df.copy()
     df = df[(df['year'] >= 2019) & (df['year'] <= 2024)]
 
+    # Keep the top_n groups with the most sections and average the rest as one trace
+    if top_n and df[group_by].nunique() > top_n:
+        top_groups = df[group_by].value_counts().index[:top_n]
+        df[group_by] = df[group_by].where(df[group_by].isin(top_groups), OTHERS_LABEL)
+    traces = df[group_by].nunique()
+
     term_order = {"Spring": 1, "Summer": 2, "Fall": 3}
     df['term_order'] = df['term'].map(term_order)
     df = df.sort_values(by=['year', 'term_order'])
@@ -44,42 +46,110 @@ def create_gpa_plot(df):
     df['year_term'] = df['year'].astype(str) + " " + df['term']
     df['year_term'] = pd.Categorical(df['year_term'], categories=df['year_term'].unique(), ordered=True)
 
-    avg_gpa_per_instructor = df.groupby(['instructor', 'year_term'])['gpa'].mean().reset_index()
+    avg_gpa_per_instructor = df.groupby([group_by, 'year_term'])['gpa'].mean().reset_index()
 
     fig = px.line(
         avg_gpa_per_instructor,
         x='year_term',
         y='gpa',
-        color='instructor',
-        title='Average GPA Trend by Instructor (Year & Term)',
+        color=group_by,
+        title=f'Average GPA Trend by {label} (Year & Term)',
         labels={'gpa': 'Average GPA', 'year_term': 'Year & Term'},
         hover_data=['gpa'],
-        markers=True
+        markers=True,
+        render_mode='webgl' if traces > WEBGL_TRACE_THRESHOLD else 'auto'
     )
     fig.update_layout(width=1200, height=800, hovermode='closest')
     fig.update_traces(
-        hovertemplate='Instructor: %{fullData.name}<br>Year & Term: %{x}<br>GPA: %{y:.2f}'
+        hovertemplate=f'{label}: %{{fullData.name}}<br>Year & Term: %{{x}}<br>GPA: %{{y:.2f}}'
     )
     return fig
 
-def best_instructors(df):
+def best_instructors(df, positions, dataset_version):
     with st.spinner('Loading best instructors...', show_time=True):
         current_year = datetime.datetime.now().year
         cutoff = current_year - 2
-        recent_df = df[df["year"] >= cutoff]
-        best_df = (
-            recent_df.groupby("instructor")["gpa"]
-            .mean()
-            .sort_values(ascending=False)
-            .reset_index()
-            .rename(columns={"gpa": "Average GPA", "instructor": "Instructor"})
-        )
+        best_df = instructor_gpa_rollup(df, dataset_version, positions, cutoff)
         best_df = best_df.set_index(pd.Index(best_df["Instructor"]))
         best_df.drop(columns=["Instructor"], inplace=True)
         st.write("**Best Instructors by Average GPA (Last 2 Years)**")
         st.dataframe(best_df)
 
 
+def results_table(processed_df):
+    renamed_df = processed_df.rename(columns={"instructor": "Instructor", "gpa": "Average GPA", "year": "Year", 
+                                              "term": "Term", "course": "Course", "section": "Section", 
+                                              "students": "Students", "total": "Students", "final_total": "Total Students"})
+    renamed_df = renamed_df.set_index(pd.Index(renamed_df["Instructor"]))
+    renamed_df.drop(columns=["Instructor"], inplace=True)
+    st.dataframe(renamed_df.style.hide(axis="index"), width=2000, height=500)
+
+
+def paginated_results(df, positions, key):
+    """
+    Sorts and pages the matching rows on the server, so only one page of rows
+    is copied and sent to the browser however broad the search is.
+    """
+    sort_col, order_col, size_col, page_col = st.columns(4)
+    sort_by = sort_col.selectbox("Sort by:", list(SORT_COLUMNS), key=f"{key}_sort")
+    descending = order_col.selectbox("Order:", ["Descending", "Ascending"], key=f"{key}_order") == "Descending"
+    page_size = size_col.selectbox("Rows per page:", PAGE_SIZES, key=f"{key}_page_size")
+    pages = max(1, math.ceil(len(positions) / page_size))
+    page = page_col.number_input(f"Page (of {pages:,}):", min_value=1, max_value=pages, value=1, key=f"{key}_page")
+
+    column = SORT_COLUMNS[sort_by]
+    if column is not None:
+        values = pd.Series(df[column].take(positions).to_numpy())
+        positions = positions[values.sort_values(ascending=not descending, kind="stable", na_position="last").index]
+    elif not descending:
+        positions = positions[::-1]
+
+    start = (page - 1) * page_size
+    page_positions = positions[start:start + page_size]
+    processed_df = process_dataframe(df, page_positions)
+    st.caption(f"Showing rows {start + 1:,}-{start + len(page_positions):,} of {len(positions):,}")
+    results_table(processed_df)
+    return processed_df
+
+
+def instructor_search(df, dataset_version, exclude_summer):
+    instructor_query = st.text_input("Search by Instructor Name (e.g., SMITH, JONES A)")
+    if not instructor_query:
+        return np.array([], dtype=np.int64), None
+
+    index = load_instructor_index(df, dataset_version)
+    name_ids = index.lookup(instructor_query)
+    if not name_ids:
+        st.write("No results found.")
+        return np.array([], dtype=np.int64), None
+    matches = [index.display_names[i] for i in name_ids]
+    selected_instructor = st.selectbox(f"Choose Instructor ({len(name_ids)} matches):", matches)
+    name_id = name_ids[matches.index(selected_instructor)]
+
+    positions = index.rows([name_id])
+    if exclude_summer:
+        positions = positions[~summer_mask(df['term'].take(positions))]
+    if len(positions) == 0:
+        st.write("No results found.")
+        return positions, None
+    positions = sort_positions(df, positions, 'course')
+
+    plot_df = df[PLOT_COLUMNS].iloc[positions]
+    courses_df = plot_df.assign(course_id=plot_df['course'].str.replace(r'-[^-]*$', '', regex=True))
+    st.markdown("---")
+    st.write(f"**{index.display_names[name_id]}**: {len(positions):,} sections across "
+             f"{courses_df['course_id'].nunique():,} courses")
+    top_n = st.slider('Courses plotted individually (the rest are averaged as "Others"):', 5, 100, DEFAULT_TOP_N)
+    fig = create_gpa_plot(courses_df, group_by='course_id', label='Course', top_n=top_n)
+    st.plotly_chart(fig)
+    processed_df = paginated_results(df, positions, "instructor_results")
+    download_export("Results", lambda: row_chunks(df, positions), "instructor_results", "instructor_export",
+                    ("instructor", dataset_version, name_id, exclude_summer), len(positions),
+                    api_export=("courses", {"instructor": index.display_names[name_id],
+                                            "exclude_summer": int(exclude_summer)}))
+    return positions, processed_df
+
+
 def main():
     st.set_page_config(page_title="Grade Distribution", page_icon="📊")
     navigation_menu()
@@ -87,32 +157,40 @@ def main():
     #
     start_time = time.time()
     #
-    df = load_data("csv_data/gradeDistribution/combined_grade_distribution.csv")
+    dataset_version = pin_dataset_version()
+    df = load_grade_data(grade_data_path(dataset_version), dataset_version)
     #
     execution_time = round(time.time() - start_time, 4)
     print(f"Loading data time: {execution_time} seconds")
     #
     exclude_summer = st.checkbox("Exclude Summer Terms", value=True)
+    search_mode = st.radio("Search by:", ["Course", "Instructor"], horizontal=True)
+    if search_mode == "Instructor":
+        positions, processed_df = instructor_search(df, dataset_version, exclude_summer)
+        memory_accounting({"Grade distribution": df}, {"Matching rows": positions, "Results table": processed_df,
+                                                         "Recent searches": st.session_state.get("recent_searches", {})})
+        return
     course_title_search = st.text_input("Search by Course Title (e.g., CSCE, MATH)")
     course_id_search = st.text_input("Search by Course ID (e.g., 120, 251)")
     #
     start_time = time.time()
     #
-    filtered_df = filter_dataframe(df, exclude_summer, course_title_search, course_id_search)
-    filtered_df = filter_dataframe(df, exclude_summer, course_title_search, course_id_search)
+    positions = narrow_positions(df, dataset_version, exclude_summer, course_title_search, course_id_search)
     #
     execution_time = round(time.time() - start_time, 4)
     print(f"Filtering data time: {execution_time} seconds")
     #
-    if filtered_df.empty:
+    processed_df = None
+    if len(positions) == 0:
         st.write("No results found.")
     elif course_title_search or course_id_search:
         # 
         start_time = time.time()
         # 
-        processed_df = process_dataframe(filtered_df)
-        fig = create_gpa_plot(processed_df)
         st.markdown("---")
+        top_n = st.slider('Instructors plotted individually (the rest are averaged as "Others"):', 5, 100,
+                          DEFAULT_TOP_N)
+        fig = create_gpa_plot(df[PLOT_COLUMNS].iloc[positions], top_n=top_n)
         st.markdown("""
             <style>
             .small-font {
@@ -127,13 +205,15 @@ def main():
         execution_time = round(time.time() - start_time, 4)
         print(f"Creating GPA plot time: {execution_time} seconds")
         #
-        best_instructors(processed_df)
-        renamed_df = processed_df.rename(columns={"instructor": "Instructor", "gpa": "Average GPA", "year": "Year", 
-                                                  "term": "Term", "course": "Course", "section": "Section", 
-                                                  "students": "Students", "total": "Students", "final_total": "Total Students"})
-        renamed_df = renamed_df.set_index(pd.Index(renamed_df["Instructor"]))
-        renamed_df.drop(columns=["Instructor"], inplace=True)
-        st.dataframe(renamed_df.style.hide(axis="index"), width=2000, height=500)
+        best_instructors(df, positions, dataset_version)
+        processed_df = paginated_results(df, positions, "course_results")
+        download_export("Results", lambda: row_chunks(df, positions), "course_results", "course_export",
+                        ("course", dataset_version, exclude_summer, course_title_search, course_id_search),
+                        len(positions), api_export=("courses", {"title": course_title_search, "id": course_id_search,
+                                                                "exclude_summer": int(exclude_summer)}))
+
+    memory_accounting({"Grade distribution": df}, {"Matching rows": positions, "Results table": processed_df,
+                                                     "Recent searches": st.session_state.get("recent_searches", {})})
    
 
 
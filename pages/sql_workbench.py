@@ -0,0 +1,70 @@
+import sqlite3
+import time
+import streamlit as st
+from pages.templates.menu import navigation_menu, credits
+from pages.templates.dataset import pin_dataset_version
+from pages.templates.sql_database import load_database, table_schemas, run_query, QUERY_TIMEOUT_SECONDS, MAX_ROWS
+
+EXAMPLE_QUERIES = {
+    "Sections with GPA < 2.0 in 2023 by department": """SELECT subject, COUNT(*) AS sections, ROUND(AVG(gpa), 3) AS average_gpa
+FROM grades
+WHERE gpa < 2.0 AND year = 2023
+GROUP BY subject
+ORDER BY sections DESC""",
+    "Average section GPA by year and term": """SELECT year, term, COUNT(*) AS sections, ROUND(AVG(gpa), 3) AS average_gpa
+FROM grades
+GROUP BY year, term
+ORDER BY year DESC, term""",
+    "Mean GPA by college in Fall 2023": """SELECT college, SUM(students) AS students,
+       ROUND(SUM(students * gpa_midpoint) / SUM(students), 3) AS mean_gpa
+FROM gpa_distribution
+WHERE year = 2023 AND semester = 'FALL'
+GROUP BY college
+ORDER BY mean_gpa DESC""",
+    "Cumulative GPA by class level and gender": """SELECT class_level, gender, SUM(students) AS students,
+       ROUND(SUM(students * gpa_midpoint) / SUM(students), 3) AS mean_gpa
+FROM cumulative_gpa
+WHERE college = 'UNIVERSITY TOTALS'
+GROUP BY class_level, gender""",
+}
+
+
+def schema_browser(dataset_version):
+    with st.expander("Tables and columns"):
+        for table, columns in table_schemas(load_database(dataset_version).conn).items():
+            st.write(f"**{table}**: " + ", ".join(f"{name} ({kind.lower()})" for name, kind in columns))
+        st.caption("GPA tables have one row per college, term, GPA group, class level and gender; "
+                   "gpa_midpoint is the middle of the GPA group.")
+
+
+def main():
+    st.set_page_config(page_title="SQL Workbench", page_icon="📊")
+    navigation_menu()
+    credits()
+    st.title("🧮 SQL Workbench")
+    st.write("Run read-only SQL queries over the grade distribution, GPA distribution and cumulative GPA data. "
+             f"Queries stop after {QUERY_TIMEOUT_SECONDS} seconds and return at most {MAX_ROWS:,} rows.")
+
+    dataset_version = pin_dataset_version()
+    schema_browser(dataset_version)
+
+    example = st.selectbox("Example queries:", list(EXAMPLE_QUERIES))
+    sql = st.text_area("SQL query:", value=EXAMPLE_QUERIES[example], height=200)
+    if not st.button("Run Query", type="primary") or not sql.strip():
+        return
+
+    start_time = time.time()
+    try:
+        result, truncated = run_query(dataset_version, sql)
+    except sqlite3.Error as e:
+        st.error(f"Query failed: {e}")
+        return
+    execution_time = round(time.time() - start_time, 3)
+
+    st.dataframe(result, hide_index=True)
+    st.caption(f"{len(result):,} rows in {execution_time} seconds"
+               + (f" (stopped at the {MAX_ROWS:,} row limit)" if truncated else ""))
+
+
+if __name__ == "__main__":
+    main()
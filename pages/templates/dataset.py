@@ -0,0 +1,47 @@
+import os
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from pages.templates.snapshots import current_snapshot, pin_snapshot, snapshot_path
+
+DATA_ROOT = "csv_data"
+BASE_VERSION = "base"
+
+
+def get_dataset_version():
+    """
+    Returns the current dataset version: the published snapshot, or BASE_VERSION
+    when the app still reads the checked-in csv_data directory.
+    """
+    return current_snapshot() or BASE_VERSION
+
+
+def pin_dataset_version():
+    """
+    Pins the current snapshot for this session at the start of a rerun, so a
+    refresh published while the rerun is reading never swaps files under it.
+    The next rerun moves the session to the newest snapshot.
+    """
+    ctx = get_script_run_ctx()
+    reader_id = ctx.session_id if ctx else f"pid-{os.getpid()}"
+    version = pin_snapshot(reader_id, st.session_state.get("dataset_version"))
+    st.session_state["dataset_version"] = version
+    return version or BASE_VERSION
+
+
+def data_dir(report, dataset_version):
+    """
+    Returns the directory holding report (e.g. "gpaDistribution") for a dataset version.
+    """
+    if dataset_version == BASE_VERSION:
+        return os.path.join(DATA_ROOT, report)
+    return os.path.join(snapshot_path(dataset_version), report)
+
+
+def write_csv_atomic(df, csv_path):
+    """
+    Writes a DataFrame to csv_path through a temporary file so the pages
+    never read a half-written CSV.
+    """
+    tmp_path = f"{csv_path}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
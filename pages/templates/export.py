@@ -0,0 +1,141 @@
+import io
+import os
+from urllib.parse import urlencode
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+from pages.templates.gpa_stats import GPA_GROUPS, COUNT_COLUMNS, read_counts, term_sort_key
+
+CHUNK_ROWS = 50_000
+FILES_PER_CHUNK = 64
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+EXPORT_CACHE_ENTRIES = 4
+MAX_PAGE_EXPORT_ROWS = 50_000
+
+# Set TAMU_API_URL to where scripts.api_server is reachable from the browser to let
+# whole-dataset exports stream from it, e.g. TAMU_API_URL=http://127.0.0.1:8600
+API_URL = os.environ.get("TAMU_API_URL")
+
+
+def row_chunks(df, positions=None, chunk_rows=CHUNK_ROWS):
+    """
+    Yields the rows of df at positions (every row when positions is None) as
+    frames of at most chunk_rows rows.
+    """
+    total = len(df) if positions is None else len(positions)
+    for start in range(0, total, chunk_rows):
+        if positions is None:
+            yield df.iloc[start:start + chunk_rows]
+        else:
+            yield df.iloc[positions[start:start + chunk_rows]]
+
+
+def gpa_table_chunks(file_info, files_per_chunk=FILES_PER_CHUNK):
+    """
+    Yields the GPA report tables in term and college order as long frames with
+    Year, Semester, College and GPA Group columns, files_per_chunk files at a time.
+    """
+    ordered = sorted(file_info, key=lambda info: (term_sort_key(info), info["college"]))
+    for start in range(0, len(ordered), files_per_chunk):
+        frames = []
+        for info in ordered[start:start + files_per_chunk]:
+            table = pd.DataFrame(read_counts(info["file_path"]), columns=COUNT_COLUMNS)
+            table.insert(0, "GPA Group", GPA_GROUPS)
+            table.insert(0, "College", info["college"])
+            table.insert(0, "Semester", info["semester"])
+            table.insert(0, "Year", int(info["year"]))
+            frames.append(table)
+        yield pd.concat(frames, ignore_index=True)
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file the Parquet writer appends to; drain() hands back what was written since the last call
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_csv(frames):
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header).encode()
+        header = False
+
+
+def iter_parquet(frames):
+    sink, writer = _ChunkSink(), None
+    for frame in frames:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table.cast(writer.schema))
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def iter_export(frames, export_format):
+    """
+    Serializes an iterable of frames to CSV or Parquet one frame at a time,
+    yielding the encoded bytes as they are produced. Parquet gets one row
+    group per frame.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    return iter_csv(frames) if export_format == "csv" else iter_parquet(frames)
+
+
+@st.cache_resource(max_entries=EXPORT_CACHE_ENTRIES, show_spinner="Preparing download...")
+def build_export(cache_key, export_format, _make_frames):
+    """
+    The serialized export identified by cache_key, which must include the
+    dataset version and the query. Built once per process, and every session
+    gets the same bytes object until it is evicted. Callers keep the exports
+    built here under MAX_PAGE_EXPORT_ROWS rows.
+    """
+    return b"".join(iter_export(_make_frames(), export_format))
+
+
+def download_export(label, make_frames, file_stem, key, cache_key, rows, api_export=None):
+    """
+    Download buttons for the rows frames returned by make_frames(). When the
+    API server is configured, api_export = (dataset, query) links to its
+    streaming endpoint. Otherwise the file is built in-process on request,
+    for at most MAX_PAGE_EXPORT_ROWS rows.
+    """
+    format_col, prepare_col = st.columns(2)
+    export_format = format_col.radio(f"{label} format:", list(EXPORT_FORMATS), format_func=str.upper,
+                                     horizontal=True, key=f"{key}_format")
+    if API_URL and api_export is not None:
+        dataset, query = api_export
+        url = f"{API_URL.rstrip('/')}/api/export/{dataset}.{export_format}?{urlencode(query)}"
+        prepare_col.link_button(f"Download {label} ({export_format.upper()})", url)
+        return
+    if rows > MAX_PAGE_EXPORT_ROWS:
+        prepare_col.write(f"Downloads here are limited to {MAX_PAGE_EXPORT_ROWS:,} rows; narrow the search to "
+                          f"export these {rows:,} rows.")
+        return
+    if not prepare_col.checkbox(f"Prepare {label.lower()} download", key=f"{key}_prepare"):
+        return
+    data = build_export(cache_key, export_format, make_frames)
+    st.download_button(f"Download {label} ({export_format.upper()})", data, file_name=f"{file_stem}.{export_format}",
+                       mime=EXPORT_FORMATS[export_format], on_click="ignore", key=f"{key}_download")
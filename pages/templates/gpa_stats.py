@@ -0,0 +1,494 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy import stats
+import streamlit as st
+from pages.templates.result_cache import shared_result
+
+CLASS_LEVELS = ['Freshman', 'Sophomore', 'Junior', 'Senior']
+GENDERS = ['Male', 'Female']
+GPA_GROUPS = ['4.000', '3.750-3.999', '3.500-3.749', '3.250-3.499', '3.000-3.249', '2.750-2.999',
+              '2.500-2.749', '2.250-2.499', '2.000-2.249', '1.750-1.999', '1.500-1.749', '1.250-1.499',
+              '1.000-1.249', '0.750-0.999', '0.500-0.749', '0.250-0.499', '0.000-0.249']
+GENDER_COLUMNS = [f'{level} {gender}' for gender in GENDERS for level in CLASS_LEVELS]
+COUNT_COLUMNS = [f'{level} {column}' for level in CLASS_LEVELS for column in GENDERS + ['Total']]
+SEMESTER_ORDER = {"SPRING": 1, "SUMMER": 2, "FALL": 3}
+READ_WORKERS = 8
+
+
+def term_sort_key(info):
+    return (info["year"], SEMESTER_ORDER.get(info["semester"], 0))
+
+
+def extract_gpa_midpoint(gpa_group):
+    if gpa_group == '4.000':
+        return 4.0
+    else:
+        lower, upper = gpa_group.split('-')
+        return (float(lower) + float(upper)) / 2
+
+
+# Midpoints in file order (highest GPA group first)
+GPA_MIDPOINTS = np.array([extract_gpa_midpoint(group) for group in GPA_GROUPS])
+
+
+def list_report_files(data_dir):
+    """
+    Describes every report CSV in data_dir from its YEAR_SEMESTER_COLLEGE file name.
+    """
+    file_info = []
+    for file in os.listdir(data_dir):
+        if not file.endswith('.csv'):
+            continue
+        parts = file.replace(".csv", "").split("_")
+        year, semester, college_name = parts[0], parts[1], " ".join(parts[2:])
+        file_info.append({"year": year, "semester": semester, "college": college_name, "file_path": os.path.join(data_dir, file)})
+    return file_info
+
+
+def read_histogram(file_path):
+    """
+    Reads one GPA report CSV, indexed by GPA Group. Errors are left to the caller.
+    """
+    data = pd.read_csv(file_path)
+    data = data.set_index(pd.Index(data["GPA Group"]))
+    data.drop(columns=["GPA Group"], inplace=True)
+    return data
+
+
+@st.cache_data(show_spinner=False)
+def load_histogram(file_path, dataset_version):
+    return read_histogram(file_path)
+
+
+def read_counts(file_path):
+    """
+    Reads one GPA report CSV into an array of shape (GPA groups, COUNT_COLUMNS),
+    with rows in GPA_GROUPS order.
+    """
+    data = read_histogram(file_path)
+    return data.reindex(index=GPA_GROUPS, columns=COUNT_COLUMNS, fill_value=0).to_numpy(dtype=np.int64)
+
+
+@st.cache_data(show_spinner=False)
+def load_count_arrays(file_paths, dataset_version):
+    """
+    Reads many GPA report CSVs in parallel and stacks them into one array of
+    shape (files, GPA groups, COUNT_COLUMNS), so statistics for all of them can
+    be computed in a single vectorized pass.
+    """
+    if not file_paths:
+        return np.zeros((0, len(GPA_GROUPS), len(COUNT_COLUMNS)), dtype=np.int64)
+    with ThreadPoolExecutor(max_workers=min(READ_WORKERS, len(file_paths))) as pool:
+        return np.stack(list(pool.map(read_counts, file_paths)))
+
+
+def column_counts(counts, columns):
+    """
+    Sums the given COUNT_COLUMNS of a (..., GPA groups, COUNT_COLUMNS) array.
+    """
+    return counts[..., [COUNT_COLUMNS.index(column) for column in columns]].sum(axis=-1)
+
+
+def histogram_quantiles(counts, quantiles, midpoints=GPA_MIDPOINTS):
+    """
+    Quantiles of the GPA values described by counts, where counts[..., i] students
+    sit at midpoints[i]. Gives the same result as expanding every student into a
+    Series and calling Series.quantile (linear interpolation), for any number of
+    leading batch dimensions. Returns an array of shape counts.shape[:-1] + (len(quantiles),).
+    """
+    order = np.argsort(midpoints, kind="stable")
+    values = midpoints[order]
+    counts = np.asarray(counts, dtype=float)[..., order]
+    cumulative = np.cumsum(counts, axis=-1)
+    total = cumulative[..., -1:]
+
+    def value_at(rank):
+        # Index of the histogram bin holding the rank-th smallest student
+        index = (cumulative[..., None, :] > rank[..., :, None]).argmax(axis=-1)
+        return values[index]
+
+    position = (total - 1) * np.asarray(quantiles, dtype=float)
+    lower = np.floor(position)
+    upper = np.minimum(lower + 1, total - 1)
+    lower_value, upper_value = value_at(lower), value_at(upper)
+    result = lower_value + (position - lower) * (upper_value - lower_value)
+    return np.where(total > 0, result, np.nan)
+
+
+def histogram_mean(counts, midpoints=GPA_MIDPOINTS, empty=0.0):
+    """
+    Mean GPA midpoint weighted by student counts, empty where there are no students.
+    """
+    counts = np.asarray(counts, dtype=float)
+    total = counts.sum(axis=-1)
+    weighted = (counts * midpoints).sum(axis=-1)
+    return np.divide(weighted, total, out=np.full_like(weighted, empty), where=total > 0)
+
+
+def share_at_least(counts, threshold, midpoints=GPA_MIDPOINTS, empty=0.0):
+    """
+    Percentage of students whose GPA midpoint is at least threshold, empty
+    where there are no students.
+    """
+    counts = np.asarray(counts, dtype=float)
+    total = counts.sum(axis=-1)
+    above = counts[..., midpoints >= threshold].sum(axis=-1)
+    return np.divide(above * 100, total, out=np.full_like(above, empty), where=total > 0)
+
+
+def histogram_distance(first, second, midpoints=GPA_MIDPOINTS):
+    """
+    Wasserstein (earth mover's) distance in GPA points between the distributions
+    described by two count arrays of the same shape, NaN where either is empty.
+    """
+    order = np.argsort(midpoints, kind="stable")
+
+    def cdf(counts):
+        cumulative = np.cumsum(np.asarray(counts, dtype=float)[..., order], axis=-1)
+        total = cumulative[..., -1:]
+        return np.divide(cumulative, total, out=np.full(cumulative.shape, np.nan), where=total > 0)
+
+    return (np.abs(cdf(first) - cdf(second))[..., :-1] * np.diff(midpoints[order])).sum(axis=-1)
+
+
+def mean_difference(first, second, midpoints=GPA_MIDPOINTS):
+    first, second = np.asarray(first, dtype=float), np.asarray(second, dtype=float)
+    present = (first.sum(axis=-1) > 0) & (second.sum(axis=-1) > 0)
+    return np.where(present, histogram_mean(first, midpoints) - histogram_mean(second, midpoints), np.nan)
+
+
+def summarize_counts(counts, midpoints=GPA_MIDPOINTS, empty=0.0):
+    """
+    Overall GPA distribution statistics for one or many histograms. Means and
+    shares of histograms without students are set to empty; quantiles are NaN.
+    """
+    counts = np.asarray(counts, dtype=float)
+    q1, median, q3 = np.moveaxis(histogram_quantiles(counts, [0.25, 0.5, 0.75], midpoints), -1, 0)
+    return {
+        "total_students": counts.sum(axis=-1),
+        "mean_gpa": histogram_mean(counts, midpoints, empty),
+        "median_gpa": median,
+        "q1_gpa": q1,
+        "q3_gpa": q3,
+        "percent_above_b": share_at_least(counts, 3.0, midpoints, empty),
+        "percent_above_c": share_at_least(counts, 2.0, midpoints, empty),
+        "percent_above_d": share_at_least(counts, 1.0, midpoints, empty),
+    }
+
+
+def gender_gpa_summary(data):
+    """
+    Average GPA for male, female and all students in every class level, plus a
+    Total row, computed from the GPA midpoint weighted by student counts.
+    """
+    midpoints = data.index.to_series().apply(extract_gpa_midpoint).to_numpy()
+    male = data[[f'{level} Male' for level in CLASS_LEVELS]].to_numpy(dtype=float)
+    female = data[[f'{level} Female' for level in CLASS_LEVELS]].to_numpy(dtype=float)
+    male = np.column_stack([male, male.sum(axis=1)])
+    female = np.column_stack([female, female.sum(axis=1)])
+
+    male_gpa = (male * midpoints[:, None]).sum(axis=0)
+    female_gpa = (female * midpoints[:, None]).sum(axis=0)
+    male_total, female_total = male.sum(axis=0), female.sum(axis=0)
+
+    def average(weighted, total):
+        return np.divide(weighted, total, out=np.zeros_like(weighted), where=total > 0)
+
+    return pd.DataFrame({
+        'Male': average(male_gpa, male_total),
+        'Female': average(female_gpa, female_total),
+        'Total': average(male_gpa + female_gpa, male_total + female_total),
+    }, index=CLASS_LEVELS + ['Total'])
+
+
+def _ascending(table, midpoints):
+    order = np.argsort(midpoints, kind="stable")
+    return np.asarray(table, dtype=float)[..., order], midpoints[order]
+
+
+def _midranks(bin_totals):
+    # Average rank of the tied students in each bin, bins in ascending GPA order
+    cumulative = np.cumsum(bin_totals)
+    return cumulative - bin_totals + (bin_totals + 1) / 2
+
+
+def _tie_sum(bin_totals):
+    return (bin_totals ** 3 - bin_totals).sum()
+
+
+def kruskal_wallis_counts(table, midpoints=GPA_MIDPOINTS):
+    """
+    Kruskal-Wallis H test (tie corrected) for groups given as rows of counts per
+    GPA bin. Returns (H, degrees of freedom, p-value, epsilon squared).
+    """
+    table, _ = _ascending(table, midpoints)
+    table = table[table.sum(axis=1) > 0]
+    group_sizes = table.sum(axis=1)
+    bin_totals = table.sum(axis=0)
+    n = bin_totals.sum()
+    if len(table) < 2 or n < 2:
+        return np.nan, len(table) - 1, np.nan, np.nan
+    rank_sums = table @ _midranks(bin_totals)
+    h = 12 / (n * (n + 1)) * (rank_sums ** 2 / group_sizes).sum() - 3 * (n + 1)
+    ties = 1 - _tie_sum(bin_totals) / (n ** 3 - n)
+    if ties == 0:
+        return np.nan, len(table) - 1, np.nan, np.nan
+    h /= ties
+    dof = len(table) - 1
+    return h, dof, stats.chi2.sf(h, dof), h / (n - 1)
+
+
+def anova_counts(table, midpoints=GPA_MIDPOINTS):
+    """
+    One-way ANOVA on the GPA midpoints for groups given as rows of counts per
+    GPA bin. Returns (F, (between, within) degrees of freedom, p-value, eta squared).
+    """
+    table = np.asarray(table, dtype=float)
+    table = table[table.sum(axis=1) > 0]
+    group_sizes = table.sum(axis=1)
+    n, k = group_sizes.sum(), len(table)
+    if k < 2 or n <= k:
+        return np.nan, (k - 1, n - k), np.nan, np.nan
+    group_means = table @ midpoints / group_sizes
+    grand_mean = (group_means * group_sizes).sum() / n
+    ss_between = (group_sizes * (group_means - grand_mean) ** 2).sum()
+    ss_within = (table * (midpoints[None, :] - group_means[:, None]) ** 2).sum()
+    total = ss_between + ss_within
+    if ss_within == 0:
+        return np.nan, (k - 1, n - k), np.nan, np.nan
+    f = (ss_between / (k - 1)) / (ss_within / (n - k))
+    return f, (k - 1, n - k), stats.f.sf(f, k - 1, n - k), ss_between / total
+
+
+def mann_whitney_counts(first, second, midpoints=GPA_MIDPOINTS):
+    """
+    Two-sided Mann-Whitney U test between two count histograms, using the normal
+    approximation with tie and continuity correction (as scipy does for large
+    samples). Returns (U of the first group, p-value, rank-biserial correlation),
+    where a positive correlation means the first group tends to have higher GPAs.
+    """
+    table, _ = _ascending(np.vstack([first, second]), midpoints)
+    n1, n2 = table.sum(axis=1)
+    if n1 == 0 or n2 == 0:
+        return np.nan, np.nan, np.nan
+    bin_totals = table.sum(axis=0)
+    n = n1 + n2
+    u1 = table[0] @ _midranks(bin_totals) - n1 * (n1 + 1) / 2
+    mean_u = n1 * n2 / 2
+    sd_u = np.sqrt(n1 * n2 / 12 * ((n + 1) - _tie_sum(bin_totals) / (n * (n - 1))))
+    if sd_u == 0:
+        return u1, np.nan, 0.0
+    z = (abs(u1 - mean_u) - 0.5) / sd_u
+    return u1, min(1.0, 2 * stats.norm.sf(z)), 2 * u1 / (n1 * n2) - 1
+
+
+def chi_square_counts(table):
+    """
+    Chi-square test of independence on a contingency table of counts. Empty rows
+    and columns are dropped first. Returns (chi2, degrees of freedom, p-value, Cramer's V).
+    """
+    table = np.asarray(table, dtype=float)
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    if min(table.shape) < 2:
+        return np.nan, 0, np.nan, np.nan
+    chi2, p, dof, _ = stats.chi2_contingency(table, correction=False)
+    cramers_v = np.sqrt(chi2 / (table.sum() * (min(table.shape) - 1)))
+    return chi2, dof, p, cramers_v
+
+
+def box_plot_stats(counts, label, midpoints=GPA_MIDPOINTS):
+    """
+    Box plot statistics (matplotlib's Axes.bxp format, 1.5 IQR whiskers) for the
+    GPA values described by counts, without expanding every student.
+    """
+    counts = np.asarray(counts, dtype=float)
+    q1, median, q3 = histogram_quantiles(counts, [0.25, 0.5, 0.75], midpoints)
+    present = midpoints[counts > 0]
+    iqr = q3 - q1
+    inside = present[(present >= q1 - 1.5 * iqr) & (present <= q3 + 1.5 * iqr)]
+    return {
+        "label": label, "med": median, "q1": q1, "q3": q3,
+        "whislo": inside.min() if len(inside) else q1,
+        "whishi": inside.max() if len(inside) else q3,
+        "fliers": np.sort(present[(present < q1 - 1.5 * iqr) | (present > q3 + 1.5 * iqr)]),
+        "mean": histogram_mean(counts, midpoints),
+    }
+
+
+@st.cache_data(show_spinner=False)
+@shared_result()
+def hypothesis_tests(file_path, dataset_version):
+    """
+    Tests of GPA differences across class levels and genders, computed on the
+    GPA Group counts so their cost does not depend on enrollment.
+    """
+    data = read_histogram(file_path)
+    midpoints = data.index.to_series().apply(extract_gpa_midpoint).to_numpy()
+    by_level = data[[f'{level} Total' for level in CLASS_LEVELS]].to_numpy(dtype=float).T
+    by_gender = np.vstack([data[[f'{level} {gender}' for level in CLASS_LEVELS]].to_numpy(dtype=float).sum(axis=1)
+                           for gender in GENDERS])
+
+    h, h_dof, h_p, epsilon_squared = kruskal_wallis_counts(by_level, midpoints)
+    f, f_dof, f_p, eta_squared = anova_counts(by_level, midpoints)
+    u, u_p, rank_biserial = mann_whitney_counts(by_gender[0], by_gender[1], midpoints)
+    level_chi2, level_dof, level_p, level_v = chi_square_counts(by_level.T)
+    gender_chi2, gender_dof, gender_p, gender_v = chi_square_counts(by_gender.T)
+
+    results = pd.DataFrame([
+        ["Kruskal-Wallis H (class levels)", h, f"{h_dof}", h_p, epsilon_squared, "epsilon squared"],
+        ["One-way ANOVA F (class levels)", f, f"{f_dof[0]}, {f_dof[1]:.0f}", f_p, eta_squared, "eta squared"],
+        ["Mann-Whitney U (male vs female)", u, "", u_p, rank_biserial, "rank-biserial r"],
+        ["Chi-square (GPA group x class level)", level_chi2, f"{level_dof}", level_p, level_v, "Cramer's V"],
+        ["Chi-square (GPA group x gender)", gender_chi2, f"{gender_dof}", gender_p, gender_v, "Cramer's V"],
+    ], columns=["Test", "Statistic", "df", "p-value", "Effect Size", "Effect Measure"]).set_index("Test")
+    box_stats = [box_plot_stats(counts, level, midpoints) for level, counts in zip(CLASS_LEVELS, by_level)]
+    return {"results": results, "box_stats": box_stats}
+
+
+@st.cache_data(show_spinner=False)
+@shared_result()
+def gpa_summary(file_path, dataset_version):
+    """
+    Statistics shown in the GPA pages' overall distribution and gender sections
+    for one report file.
+    """
+    data = read_histogram(file_path)
+    midpoints = data.index.to_series().apply(extract_gpa_midpoint).to_numpy()
+    counts = data[GENDER_COLUMNS].sum(axis=1).to_numpy()
+    summary = {key: float(value) for key, value in summarize_counts(counts, midpoints).items()}
+    summary["gender_gpa"] = gender_gpa_summary(data)
+    return summary
+
+
+def warm_file(file_path, dataset_version):
+    """
+    Fills the caches the GPA pages read for one file. Used by the prefetcher.
+    """
+    load_histogram(file_path, dataset_version)
+    gpa_summary(file_path, dataset_version)
+    hypothesis_tests(file_path, dataset_version)
+
+
+def term_trend(counts, labels):
+    """
+    Per-term statistics for a stack of report arrays, one row per label. Terms
+    without students get NaN statistics, which the trend plot leaves as gaps.
+    """
+    students = column_counts(counts, GENDER_COLUMNS)
+    summary = summarize_counts(students, empty=np.nan)
+    trend = pd.DataFrame({
+        "Total Students": summary["total_students"].astype(int),
+        "Mean GPA": summary["mean_gpa"],
+        "Median GPA": summary["median_gpa"],
+        "% GPA >= 3.0": summary["percent_above_b"],
+    }, index=pd.Index(labels, name="Term"))
+    for level in CLASS_LEVELS:
+        trend[f"{level} Mean GPA"] = histogram_mean(column_counts(counts, [f'{level} Male', f'{level} Female']),
+                                                    empty=np.nan)
+    return trend
+
+
+def college_comparison(counts, labels):
+    """
+    Summary statistics for a stack of report arrays (one per college), plus each
+    college's share of students in every GPA group. Colleges without students
+    get NaN statistics and shares.
+    """
+    students = column_counts(counts, GENDER_COLUMNS)
+    summary = summarize_counts(students, empty=np.nan)
+    comparison = pd.DataFrame({
+        "Total Students": summary["total_students"].astype(int),
+        "Mean GPA": summary["mean_gpa"],
+        "Median GPA": summary["median_gpa"],
+        "Q1 GPA": summary["q1_gpa"],
+        "Q3 GPA": summary["q3_gpa"],
+        "% GPA >= 3.0": summary["percent_above_b"],
+        "% GPA >= 2.0": summary["percent_above_c"],
+        "Male Mean GPA": histogram_mean(column_counts(counts, [f'{level} Male' for level in CLASS_LEVELS]),
+                                        empty=np.nan),
+        "Female Mean GPA": histogram_mean(column_counts(counts, [f'{level} Female' for level in CLASS_LEVELS]),
+                                          empty=np.nan),
+    }, index=pd.Index(labels, name="College"))
+    totals = students.sum(axis=-1, keepdims=True)
+    shares = pd.DataFrame(np.divide(students * 100, totals, out=np.full(students.shape, np.nan),
+                                    where=totals > 0), index=comparison.index, columns=GPA_GROUPS)
+    return comparison, shares
+
+
+def align_reports(term_info, cumulative_info):
+    """
+    Pairs the term and cumulative report files sharing a (year, semester,
+    college) key, in term and college order.
+    """
+    def key(info):
+        return info["year"], info["semester"], info["college"]
+
+    cumulative = {key(info): info for info in cumulative_info}
+    pairs = [(info, cumulative[key(info)]) for info in term_info if key(info) in cumulative]
+    return sorted(pairs, key=lambda pair: (term_sort_key(pair[0]), pair[0]["college"]))
+
+
+def distribution_deltas(term_counts, cumulative_counts, labels):
+    """
+    How each term's GPA distribution differs from the cumulative distribution
+    for the same key, for two aligned stacks of report arrays: mean, median and
+    share differences (term minus cumulative), the distance between the two
+    distributions and the mean difference in every class level.
+    """
+    term, cumulative = column_counts(term_counts, GENDER_COLUMNS), column_counts(cumulative_counts, GENDER_COLUMNS)
+    term_summary, cumulative_summary = summarize_counts(term), summarize_counts(cumulative)
+    deltas = pd.DataFrame({
+        "Term Mean GPA": term_summary["mean_gpa"],
+        "Cumulative Mean GPA": cumulative_summary["mean_gpa"],
+        "Mean Difference": mean_difference(term, cumulative),
+        "Median Difference": term_summary["median_gpa"] - cumulative_summary["median_gpa"],
+        "% GPA >= 3.0 Difference": term_summary["percent_above_b"] - cumulative_summary["percent_above_b"],
+        "Distribution Distance": histogram_distance(term, cumulative),
+    }, index=pd.MultiIndex.from_tuples(labels, names=["Year", "Semester", "College"]))
+    for level in CLASS_LEVELS:
+        columns = [f'{level} Male', f'{level} Female']
+        deltas[f"{level} Mean Difference"] = mean_difference(column_counts(term_counts, columns),
+                                                             column_counts(cumulative_counts, columns))
+    return deltas
+
+
+def batch_statistics(counts):
+    """
+    The GPA pages' per-file statistics (descriptive statistics, gender averages,
+    quantiles and threshold percentages) for a stack of report arrays, as one
+    plain dict per file.
+    """
+    students = column_counts(counts, GENDER_COLUMNS)
+    summary = summarize_counts(students)
+    group_totals = column_counts(counts, [f'{level} Total' for level in CLASS_LEVELS])
+    grand_totals = group_totals.sum(axis=-1, keepdims=True)
+    group_shares = np.divide(group_totals * 100, grand_totals, out=np.zeros(group_totals.shape), where=grand_totals > 0)
+    gender_counts = {gender: {level: column_counts(counts, [f'{level} {gender}']) for level in CLASS_LEVELS}
+                     for gender in GENDERS}
+    gender_means = {}
+    for level in CLASS_LEVELS + ['Total']:
+        levels = CLASS_LEVELS if level == 'Total' else [level]
+        male = column_counts(counts, [f'{lvl} Male' for lvl in levels])
+        female = column_counts(counts, [f'{lvl} Female' for lvl in levels])
+        gender_means[level] = {'Male': histogram_mean(male), 'Female': histogram_mean(female),
+                               'Total': histogram_mean(male + female)}
+
+    results = []
+    for i in range(len(counts)):
+        total_men = int(sum(gender_counts['Male'][level][i].sum() for level in CLASS_LEVELS))
+        total_women = int(sum(gender_counts['Female'][level][i].sum() for level in CLASS_LEVELS))
+        results.append({
+            **{key: float(value[i]) for key, value in summary.items()},
+            "total_men": total_men,
+            "total_women": total_women,
+            "men_women_ratio": total_men / total_women if total_women > 0 else None,
+            "gpa_groups": {group: {"students": int(group_totals[i, j]), "percentage": float(group_shares[i, j])}
+                           for j, group in enumerate(GPA_GROUPS)},
+            "gender_counts": {f'{level} {gender}': int(gender_counts[gender][level][i].sum())
+                              for level in CLASS_LEVELS for gender in GENDERS},
+            "gender_gpa": {level: {gender: float(values[gender][i]) for gender in values}
+                           for level, values in gender_means.items()},
+        })
+    return results
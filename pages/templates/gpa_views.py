@@ -0,0 +1,170 @@
+import matplotlib.pyplot as plt
+import streamlit as st
+from pages.templates.dataset import data_dir
+from pages.templates.gpa_stats import (load_count_arrays, list_report_files, term_sort_key, term_trend,
+                                       college_comparison, align_reports, distribution_deltas)
+from pages.templates.percentiles import load_percentile_tables, PERCENTILE_LEVELS, PERCENTILE_GENDERS
+
+
+def term_trend_view(file_info, college, dataset_version):
+    """
+    Shows how a college's GPA distribution moved across every term on record.
+    All of its files are read in one batch and the statistics for every term
+    are computed together.
+    """
+    st.write(f"### GPA Trend for: **{college.replace('_', ' ')}**")
+    exclude_summer = st.checkbox("Exclude Summer Terms", value=False)
+
+    terms = sorted((info for info in file_info if info["college"] == college and
+                    not (exclude_summer and info["semester"] == "SUMMER")), key=term_sort_key)
+    if not terms:
+        st.write("⚠️ No terms found for the selected college.")
+        return
+
+    counts = load_count_arrays(tuple(info["file_path"] for info in terms), dataset_version)
+    trend = term_trend(counts, [f"{info['semester'].title()} {info['year']}" for info in terms])
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(trend.index, trend["Mean GPA"], marker='o', label='Mean GPA')
+    ax.plot(trend.index, trend["Median GPA"], marker='s', label='Median GPA')
+    ax.set_xlabel('Term')
+    ax.set_ylabel('GPA')
+    ax.set_ylim(0, 4.0)
+    ax.tick_params(axis='x', rotation=45)
+    share_ax = ax.twinx()
+    share_ax.plot(trend.index, trend["% GPA >= 3.0"], marker='^', color='green', linestyle='--',
+                  label='% GPA >= 3.0')
+    share_ax.set_ylabel('% of Students with GPA >= 3.0')
+    share_ax.set_ylim(0, 100)
+    lines, labels = ax.get_legend_handles_labels()
+    share_lines, share_labels = share_ax.get_legend_handles_labels()
+    ax.legend(lines + share_lines, labels + share_labels, loc='lower left')
+    ax.set_title('GPA Trend across Terms')
+    plt.tight_layout()
+    st.pyplot(fig)
+
+    st.dataframe(trend.style.format({"Total Students": "{:,}", "% GPA >= 3.0": "{:.2f}%"}, precision=3, na_rep="-"))
+
+
+def college_comparison_view(file_info, year, semester, colleges, dataset_version):
+    """
+    Compares the GPA distributions of several colleges in one term. The
+    selected files are read in one batch and summarized together.
+    """
+    st.write(f"### Comparing Colleges: **{semester.title()} {year}**")
+    selected = sorted((info for info in file_info if info["year"] == year and info["semester"] == semester and
+                       info["college"] in colleges), key=lambda info: info["college"])
+    if not selected:
+        st.write("⚠️ No matching data found for the selected combination. Please choose different filters.")
+        return
+
+    counts = load_count_arrays(tuple(info["file_path"] for info in selected), dataset_version)
+    comparison, shares = college_comparison(counts, [info["college"].replace('_', ' ') for info in selected])
+
+    st.write("#### Summary Statistics by College")
+    st.dataframe(comparison.style.format({"Total Students": "{:,}", "% GPA >= 3.0": "{:.2f}%",
+                                          "% GPA >= 2.0": "{:.2f}%"}, precision=3, na_rep="-"))
+    empty = comparison.index[comparison["Total Students"] == 0]
+    if len(empty):
+        st.caption(f"No students reported for {', '.join(empty)}; these colleges are left blank in the charts.")
+
+    st.write("#### Mean and Median GPA by College")
+    ranked = comparison.sort_values("Mean GPA")
+    fig_bar, ax_bar = plt.subplots(figsize=(12, max(4, 0.4 * len(ranked))))
+    ax_bar.barh(ranked.index, ranked["Mean GPA"], label='Mean GPA')
+    ax_bar.scatter(ranked["Median GPA"], ranked.index, color='black', zorder=3, label='Median GPA')
+    ax_bar.set_xlabel('GPA')
+    ax_bar.set_xlim(0, 4.0)
+    ax_bar.legend()
+    plt.tight_layout()
+    st.pyplot(fig_bar)
+
+    st.write("#### Share of Students in each GPA Group")
+    fig_heat, ax_heat = plt.subplots(figsize=(12, max(4, 0.4 * len(shares))))
+    ordered = shares[shares.columns[::-1]]
+    image = ax_heat.imshow(ordered.to_numpy(), aspect='auto', cmap='viridis')
+    ax_heat.set_xticks(range(len(ordered.columns)), ordered.columns, rotation=45, ha='right')
+    ax_heat.set_yticks(range(len(ordered.index)), ordered.index)
+    ax_heat.set_xlabel('GPA Group')
+    fig_heat.colorbar(image, ax=ax_heat, label='% of Students')
+    plt.tight_layout()
+    st.pyplot(fig_heat)
+
+
+def percentile_widget(report, file_info, dataset_version):
+    """
+    Tells a student what percentile a GPA is for the selected college and term,
+    read from the precomputed percentile tables.
+    """
+    st.write("## 7. Where Does My GPA Fall?")
+    gpa_col, level_col, gender_col = st.columns(3)
+    gpa = gpa_col.number_input("Your GPA:", min_value=0.0, max_value=4.0, value=3.0, step=0.01, format="%.2f")
+    class_level = level_col.selectbox("Class Level:", PERCENTILE_LEVELS, index=len(PERCENTILE_LEVELS) - 1)
+    gender = gender_col.selectbox("Gender:", PERCENTILE_GENDERS, index=len(PERCENTILE_GENDERS) - 1)
+
+    tables = load_percentile_tables(dataset_version)
+    percentile = tables.percentile(report, file_info["year"], file_info["semester"], file_info["college"],
+                                   gpa, class_level, gender)
+    if percentile is None:
+        st.write("No students in this group for the selected term.")
+    else:
+        st.metric("Percentile", f"{percentile:.1f}%")
+        st.caption(f"A GPA of {gpa:.2f} is higher than about {percentile:.1f}% of students in this group. "
+                   "Students are assumed to be spread evenly within each GPA group.")
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_distribution_deltas(dataset_version):
+    """
+    Term vs cumulative deltas for every (year, semester, college) present in
+    both reports, computed in one pass over the two stacked count arrays.
+    """
+    pairs = align_reports(list_report_files(data_dir("gpaDistribution", dataset_version)),
+                          list_report_files(data_dir("cumulativeGPA", dataset_version)))
+    term_counts = load_count_arrays(tuple(term["file_path"] for term, _ in pairs), dataset_version)
+    cumulative_counts = load_count_arrays(tuple(cumulative["file_path"] for _, cumulative in pairs), dataset_version)
+    labels = [(term["year"], term["semester"], term["college"]) for term, _ in pairs]
+    return distribution_deltas(term_counts, cumulative_counts, labels)
+
+
+def term_cumulative_view(college, dataset_version):
+    """
+    Compares each term's GPA distribution with the cumulative distribution for
+    the same term, for one college and across all colleges.
+    """
+    st.write(f"### Term vs Cumulative GPA for: **{college.replace('_', ' ')}**")
+    deltas = load_distribution_deltas(dataset_version)
+    if college not in deltas.index.get_level_values("College"):
+        st.write("⚠️ No terms with both term and cumulative data for the selected college.")
+        return
+
+    selected = deltas.xs(college, level="College")
+    selected.index = [f"{semester.title()} {year}" for year, semester in selected.index]
+    selected.index.name = "Term"
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(selected.index, selected["Term Mean GPA"], marker='o', label='Term Mean GPA')
+    ax.plot(selected.index, selected["Cumulative Mean GPA"], marker='s', label='Cumulative Mean GPA')
+    ax.set_xlabel('Term')
+    ax.set_ylabel('GPA')
+    ax.set_ylim(0, 4.0)
+    ax.tick_params(axis='x', rotation=45)
+    distance_ax = ax.twinx()
+    distance_ax.plot(selected.index, selected["Distribution Distance"], marker='^', color='green', linestyle='--',
+                     label='Distribution Distance')
+    distance_ax.set_ylabel('Distribution Distance (GPA points)')
+    distance_ax.set_ylim(bottom=0)
+    lines, labels = ax.get_legend_handles_labels()
+    distance_lines, distance_labels = distance_ax.get_legend_handles_labels()
+    ax.legend(lines + distance_lines, labels + distance_labels, loc='lower left')
+    ax.set_title('Term vs Cumulative GPA')
+    plt.tight_layout()
+    st.pyplot(fig)
+
+    st.write("Differences are term minus cumulative. The distribution distance is the average number of GPA "
+             "points students would have to move to turn one distribution into the other.")
+    st.dataframe(selected.style.format(precision=3))
+
+    st.write("#### Largest Shifts Across All Colleges and Terms")
+    largest = deltas.reindex(deltas["Distribution Distance"].sort_values(ascending=False).index).head(10)
+    st.dataframe(largest.style.format(precision=3))
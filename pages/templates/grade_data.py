@@ -0,0 +1,121 @@
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from pages.templates.dataset import data_dir
+from pages.templates.result_cache import shared_result
+
+GRADE_REPORT = "gradeDistribution"
+COMBINED_GRADE_FILE = "combined_grade_distribution.csv"
+RECENT_SEARCHES = 8
+RECENT_SEARCH_BYTES = 1024 * 1024
+
+
+def grade_data_path(dataset_version):
+    return os.path.join(data_dir(GRADE_REPORT, dataset_version), COMBINED_GRADE_FILE)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_grade_data(file_path, dataset_version):
+    """
+    Loads the combined grade distribution once per process. Every session gets
+    the same Arrow-backed DataFrame instead of a copy, so it must be treated as
+    read-only; select rows with the positions from filter_positions.
+    """
+    return pd.read_csv(file_path, engine="pyarrow", dtype_backend="pyarrow")
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+@shared_result()
+def filter_positions(_df, dataset_version, exclude_summer, course_title_search, course_id_search):
+    """
+    Returns the row positions of _df matching the filters, ordered by year and
+    term (newest first) and then instructor. Only the positions are cached and
+    copied per rerun, never the rows themselves.
+    """
+    mask = course_mask(_df["course"], course_title_search, course_id_search)
+    if exclude_summer:
+        mask &= ~summer_mask(_df['term'])
+
+    return sort_positions(_df, np.flatnonzero(mask), 'instructor')
+
+
+def course_mask(courses, course_title_search, course_id_search):
+    courses = courses.fillna('')
+    mask = np.ones(len(courses), dtype=bool)
+    for search in (course_title_search, course_id_search):
+        if search:
+            mask &= courses.str.contains(search, case=False, regex=False).to_numpy(dtype=bool)
+    return mask
+
+
+def narrow_positions(df, dataset_version, exclude_summer, course_title_search, course_id_search):
+    """
+    Same result as filter_positions, reusing this session's recent searches:
+    when an earlier query's search strings are contained in the new ones, only
+    that query's matches are scanned, so refining a search ("CSCE" then
+    "CSCE-12") costs time proportional to the current matches.
+
+    filter_positions already caches its results once per process, so the
+    session only keeps the positions it narrowed itself, up to
+    RECENT_SEARCH_BYTES. Other searches are remembered as None and fetched
+    from filter_positions again.
+    """
+    recent = st.session_state.setdefault("recent_searches", {})
+    key = (dataset_version, exclude_summer, course_title_search, course_id_search)
+    positions = recent.get(key)
+    if key not in recent:
+        title, course_id = course_title_search.lower(), course_id_search.lower()
+        narrower = {earlier: held for earlier, held in recent.items()
+                    if earlier[:2] == key[:2] and earlier[2].lower() in title and earlier[3].lower() in course_id}
+        if narrower:
+            held = [positions for positions in narrower.values() if positions is not None]
+            # Otherwise the most specific earlier query has the fewest matches to scan
+            base = min(held, key=len) if held else filter_positions(
+                df, *max(narrower, key=lambda earlier: len(earlier[2]) + len(earlier[3])))
+            positions = base[course_mask(df["course"].take(base), course_title_search, course_id_search)]
+            recent[key] = positions if positions.nbytes <= RECENT_SEARCH_BYTES else None
+        else:
+            recent[key] = None
+    if positions is None:
+        positions = filter_positions(df, dataset_version, exclude_summer, course_title_search, course_id_search)
+    # Keep the most recently used searches, oldest first
+    recent[key] = recent.pop(key)
+    while len(recent) > RECENT_SEARCHES or recent_searches_nbytes(recent) > RECENT_SEARCH_BYTES:
+        del recent[next(iter(recent))]
+    return positions
+
+
+def recent_searches_nbytes(recent):
+    return sum(positions.nbytes for positions in recent.values() if positions is not None)
+
+
+def summer_mask(terms):
+    return terms.str.contains('Summer', case=False).fillna(False).to_numpy(dtype=bool)
+
+
+def sort_positions(df, positions, by):
+    """
+    Orders row positions by year and term (newest first) and then by the column by.
+    """
+    keys = df[['year', 'term', by]].iloc[positions].reset_index(drop=True)
+    order = keys.sort_values(by=['year', 'term', by], ascending=[False, False, True]).index.to_numpy()
+    return positions[order]
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+@shared_result()
+def instructor_gpa_rollup(_df, dataset_version, positions, since_year):
+    """
+    Average GPA per instructor over the rows at positions from since_year on,
+    best first.
+    """
+    rows = _df[["instructor", "year", "gpa"]].iloc[positions]
+    recent_df = rows[rows["year"] >= since_year]
+    return (
+        recent_df.groupby("instructor")["gpa"]
+        .mean()
+        .sort_values(ascending=False)
+        .reset_index()
+        .rename(columns={"gpa": "Average GPA", "instructor": "Instructor"})
+    )
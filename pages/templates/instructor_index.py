@@ -0,0 +1,77 @@
+import re
+from bisect import bisect_left
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+
+def normalize_instructor(name):
+    """
+    Upper-cases a name and replaces punctuation with spaces, so "O'Brien, J."
+    and "OBRIEN J" style variants share tokens.
+    """
+    return " ".join(re.sub(r"[^A-Z0-9 ]+", " ", str(name).upper().replace("'", "")).split())
+
+
+class InstructorIndex:
+    """
+    Index from normalized instructor names to their rows in the combined grade
+    data. Rows of one instructor form a contiguous range of `order`, and every
+    name token is kept in a sorted list so prefixes are found by bisection.
+    """
+    def __init__(self, instructors):
+        raw_codes, raw_names = pd.factorize(pd.Series(instructors).fillna("").astype(str), sort=False)
+        normalized = pd.Index([normalize_instructor(name) for name in raw_names])
+        name_codes, self.names = pd.factorize(normalized, sort=True)
+        codes = name_codes[raw_codes]
+        # Show each instructor as spelled in the data rather than normalized
+        self.display_names = pd.Series(raw_names).groupby(name_codes).first().tolist()
+
+        self.order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[self.order], np.arange(len(self.names) + 1))
+        self.starts, self.ends = bounds[:-1], bounds[1:]
+
+        token_names = {}
+        for name_id, name in enumerate(self.names):
+            for token in name.split():
+                token_names.setdefault(token, set()).add(name_id)
+        self.tokens = sorted(token_names)
+        self.token_names = [token_names[token] for token in self.tokens]
+
+    def _names_with_prefix(self, prefix):
+        matched = set()
+        i = bisect_left(self.tokens, prefix)
+        while i < len(self.tokens) and self.tokens[i].startswith(prefix):
+            matched |= self.token_names[i]
+            i += 1
+        return matched
+
+    def lookup(self, query):
+        """
+        Returns the ids of instructors whose name has a token starting with every
+        token of the query, in name order.
+        """
+        query_tokens = normalize_instructor(query).split()
+        if not query_tokens:
+            return []
+        matched = None
+        # Narrow with the most selective (longest) token first
+        for token in sorted(query_tokens, key=len, reverse=True):
+            names = self._names_with_prefix(token)
+            matched = names if matched is None else matched & names
+            if not matched:
+                return []
+        return sorted(matched)
+
+    def rows(self, name_ids):
+        """
+        Row positions in the grade data for the given instructor ids.
+        """
+        if not len(name_ids):
+            return np.array([], dtype=np.int64)
+        return np.concatenate([self.order[self.starts[i]:self.ends[i]] for i in name_ids])
+
+
+@st.cache_resource(max_entries=2, show_spinner="Building instructor index...")
+def load_instructor_index(_df, dataset_version):
+    return InstructorIndex(_df["instructor"].to_numpy(dtype=object, na_value=None))
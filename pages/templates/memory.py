@@ -0,0 +1,38 @@
+import pandas as pd
+import streamlit as st
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum()) if df is not None else 0
+
+
+def format_bytes(num_bytes):
+    for unit in ["B", "KB", "MB"]:
+        if num_bytes < 1024:
+            return f"{num_bytes:,.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:,.1f} GB"
+
+
+def memory_accounting(shared_frames, session_frames):
+    """
+    Shows how much memory is shared by every session in this process and how
+    much this session holds on its own. Both arguments map a label to a
+    DataFrame (or a numpy array for row positions, or a dict of either).
+    """
+    def nbytes(obj):
+        if isinstance(obj, dict):
+            return sum(nbytes(item) for item in obj.values())
+        return obj.nbytes if hasattr(obj, "nbytes") else frame_nbytes(obj)
+
+    shared_total = sum(nbytes(obj) for obj in shared_frames.values())
+    session_total = sum(nbytes(obj) for obj in session_frames.values())
+    with st.sidebar.expander("Memory usage"):
+        rows = [{"Object": label, "Scope": "Shared (process)", "Size": format_bytes(nbytes(obj))}
+                for label, obj in shared_frames.items()]
+        rows += [{"Object": label, "Scope": "This session", "Size": format_bytes(nbytes(obj))}
+                 for label, obj in session_frames.items()]
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+        st.write(f"**Shared by all sessions:** {format_bytes(shared_total)}")
+        st.write(f"**Held by this session:** {format_bytes(session_total)}")
+        st.write(f"**Per session without sharing:** {format_bytes(shared_total + session_total)}")
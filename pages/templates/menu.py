@@ -7,6 +7,7 @@ def navigation_menu():
     st.sidebar.page_link("pages/grade_distribution.py", label="Grade Distribution")
     st.sidebar.page_link("pages/gpa_distribution_app.py", label="GPA Distribution")
     st.sidebar.page_link("pages/cumulative_gpa_app.py", label="Cumulative GPA")
+    st.sidebar.page_link("pages/sql_workbench.py", label="SQL Workbench")
     
     # st.sidebar.markdown("---")
     # st.sidebar.markdown("© 2025 TAMU Statistics. All rights reserved.")
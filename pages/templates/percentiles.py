@@ -0,0 +1,72 @@
+import numpy as np
+import streamlit as st
+from pages.templates.dataset import data_dir
+from pages.templates.gpa_stats import (CLASS_LEVELS, GENDERS, GPA_GROUPS, list_report_files, load_count_arrays,
+                                       column_counts)
+
+REPORTS = ["gpaDistribution", "cumulativeGPA"]
+PERCENTILE_LEVELS = CLASS_LEVELS + ["All"]
+PERCENTILE_GENDERS = GENDERS + ["All"]
+BIN_WIDTH = 0.25
+# GPA groups in ascending order: 0.000-0.249 ... 3.750-3.999, then 4.000 on its own
+ASCENDING_GROUPS = GPA_GROUPS[::-1]
+
+
+class PercentileTables:
+    """
+    Cumulative GPA distributions for every (report, year, semester, college,
+    class level, gender), stored as one float32 array. cdf[i, level, gender, k]
+    is the share of students in the k lowest GPA groups, so a percentile is an
+    index lookup plus a linear interpolation inside one group.
+    """
+    def __init__(self, keys, cdf):
+        self.keys = {key: i for i, key in enumerate(keys)}
+        self.cdf = cdf
+
+    @classmethod
+    def from_counts(cls, keys, counts):
+        tables = np.zeros((len(keys), len(PERCENTILE_LEVELS), len(PERCENTILE_GENDERS), len(GPA_GROUPS) + 1),
+                          dtype=np.float32)
+        for l, level in enumerate(PERCENTILE_LEVELS):
+            levels = CLASS_LEVELS if level == "All" else [level]
+            for g, gender in enumerate(PERCENTILE_GENDERS):
+                genders = GENDERS if gender == "All" else [gender]
+                students = column_counts(counts, [f'{lvl} {gnd}' for lvl in levels for gnd in genders])[..., ::-1]
+                cumulative = np.concatenate([np.zeros((len(keys), 1)), np.cumsum(students, axis=-1)], axis=-1)
+                totals = cumulative[:, -1:]
+                tables[:, l, g] = np.divide(cumulative, totals, out=np.full(cumulative.shape, np.nan),
+                                            where=totals > 0)
+        return cls(keys, tables)
+
+    def percentile(self, report, year, semester, college, gpa, class_level="All", gender="All"):
+        """
+        Percentage of students in the selection with a lower GPA than gpa
+        (interpolated within the GPA group it falls in), or None when the
+        selection has no students or does not exist.
+        """
+        i = self.keys.get((report, str(year), str(semester).upper(), college))
+        if i is None:
+            return None
+        row = self.cdf[i, PERCENTILE_LEVELS.index(class_level), PERCENTILE_GENDERS.index(gender)]
+        gpa = min(max(float(gpa), 0.0), 4.0)
+        if gpa >= 4.0:
+            share = row[len(GPA_GROUPS) - 1]
+        else:
+            group = min(int(gpa / BIN_WIDTH), len(GPA_GROUPS) - 2)
+            fraction = (gpa - group * BIN_WIDTH) / BIN_WIDTH
+            share = row[group] + fraction * (row[group + 1] - row[group])
+        return None if np.isnan(share) else float(share * 100)
+
+    @property
+    def nbytes(self):
+        return self.cdf.nbytes
+
+
+@st.cache_resource(max_entries=2, show_spinner="Building percentile tables...")
+def load_percentile_tables(dataset_version):
+    keys, arrays = [], []
+    for report in REPORTS:
+        file_infos = list_report_files(data_dir(report, dataset_version))
+        keys += [(report, info["year"], info["semester"], info["college"]) for info in file_infos]
+        arrays.append(load_count_arrays(tuple(info["file_path"] for info in file_infos), dataset_version))
+    return PercentileTables.from_counts(keys, np.concatenate(arrays))
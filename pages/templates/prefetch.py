@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from pages.templates.gpa_stats import term_sort_key
+
+PREFETCH_WORKERS = 2
+PREFETCH_BUDGET = 6
+
+
+@st.cache_resource
+def _prefetch_state():
+    # One small pool per process, shared by every session
+    return {
+        "pool": ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="prefetch"),
+        "submitted": set(),
+        "lock": threading.Lock(),
+    }
+
+
+def neighbour_selections(file_info, year, semester, college, budget=PREFETCH_BUDGET):
+    """
+    Returns up to budget file_info entries a user is likely to pick next: the
+    previous and next term for the same college first, then the colleges next
+    to the selected one (alphabetically) in the same term.
+    """
+    same_college = sorted((info for info in file_info if info["college"] == college), key=term_sort_key)
+    same_term = sorted((info for info in file_info if info["year"] == year and info["semester"] == semester),
+                       key=lambda info: info["college"])
+    candidates = []
+    for ordered, matches in [(same_college, lambda info: info["year"] == year and info["semester"] == semester),
+                             (same_term, lambda info: info["college"] == college)]:
+        index = next((i for i, info in enumerate(ordered) if matches(info)), None)
+        if index is None:
+            continue
+        # Walk outwards from the selection: one step back, one forward, two back, ...
+        for distance in range(1, len(ordered)):
+            for neighbour in (index - distance, index + distance):
+                if 0 <= neighbour < len(ordered):
+                    candidates.append((distance, ordered[neighbour]))
+    # Adjacent terms and direct sibling colleges first, wider neighbours after
+    candidates.sort(key=lambda candidate: candidate[0])
+    return [info for _, info in candidates[:budget]]
+
+
+def prefetch_neighbours(file_info, year, semester, college, dataset_version, warm, budget=PREFETCH_BUDGET):
+    """
+    Submits warm(file_path, dataset_version) for the neighbouring selections to
+    the background pool, so their cached results are ready when the user
+    switches. Each file is submitted at most once per dataset version.
+    """
+    state = _prefetch_state()
+    for info in neighbour_selections(file_info, year, semester, college, budget):
+        key = (dataset_version, info["file_path"], warm.__qualname__)
+        with state["lock"]:
+            if key in state["submitted"]:
+                continue
+            state["submitted"].add(key)
+        state["pool"].submit(_run_quietly, warm, info["file_path"], dataset_version)
+
+
+def _run_quietly(warm, file_path, dataset_version):
+    try:
+        warm(file_path, dataset_version)
+    except Exception as e:
+        print(f"Prefetch failed for {file_path}: {e}")
@@ -0,0 +1,155 @@
+import os, time, pickle, hashlib, inspect, sqlite3, threading, functools
+
+# Set TAMU_RESULT_CACHE to a SQLite file on a volume shared by all replicas to
+# let them reuse each other's results, e.g. TAMU_RESULT_CACHE=/shared/results.sqlite
+# Results are keyed by dataset version name (base, v000001, ...), and those names
+# are only unique within one csv_data directory and csv_snapshots root, so
+# replicas sharing the cache must share those directories too.
+RESULT_CACHE_PATH = os.environ.get("TAMU_RESULT_CACHE")
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("TAMU_RESULT_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# WAL needs shared memory on one host and must not be used on network filesystems;
+# set TAMU_RESULT_CACHE_WAL=1 only when every replica runs on the same host
+RESULT_CACHE_WAL = os.environ.get("TAMU_RESULT_CACHE_WAL", "0") not in ("0", "false")
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+# Hits refresh an entry's access time at most this often, so most reads don't write
+ACCESS_RESOLUTION_SECONDS = 60
+
+
+class ResultCache:
+    """
+    Persistent cache of pickled function results in a SQLite database. Entries
+    expire after their TTL, and the least recently used entries are evicted once
+    the stored results exceed max_bytes.
+    """
+    def __init__(self, path, max_bytes=RESULT_CACHE_MAX_BYTES, wal=RESULT_CACHE_WAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.wal = wal
+        self.local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    function TEXT NOT NULL,
+                    dataset_version TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_expires ON results (expires)")
+
+    def _connect(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            if self.wal:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            else:
+                # The rollback journal works over network filesystems; also undoes an earlier WAL setting
+                conn.execute("PRAGMA journal_mode=DELETE")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        """
+        Returns (True, value) for a live entry and (False, None) otherwise.
+        """
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT value, accessed FROM results WHERE key = ? AND expires > ?",
+                           (key, now)).fetchone()
+        if row is None:
+            return False, None
+        value, accessed = row
+        if now - accessed >= ACCESS_RESOLUTION_SECONDS:
+            with conn:
+                conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        return True, pickle.loads(value)
+
+    def set(self, key, function, dataset_version, value, ttl):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         (key, function, str(dataset_version), blob, len(blob), now + ttl, now))
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM results WHERE expires <= ?", (now,))
+        excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        freed = 0
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY accessed"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """
+    Returns the process's ResultCache, or None when TAMU_RESULT_CACHE is unset.
+    """
+    global _cache
+    if RESULT_CACHE_PATH is None:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(RESULT_CACHE_PATH)
+    return _cache
+
+
+def shared_result(ttl=DEFAULT_TTL_SECONDS):
+    """
+    Opts a function into the shared result cache. The function must take a
+    dataset_version argument; results are keyed by the function, the dataset
+    version and the remaining arguments. As with st.cache_data, arguments whose
+    name starts with an underscore are left out of the key. Without
+    TAMU_RESULT_CACHE the function is called directly.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_result_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            dataset_version = bound.arguments["dataset_version"]
+            key_args = [(arg, value) for arg, value in bound.arguments.items()
+                        if not arg.startswith("_") and arg != "dataset_version"]
+            key = hashlib.sha256(pickle.dumps((name, str(dataset_version), key_args))).hexdigest()
+            try:
+                hit, value = cache.get(key)
+            except sqlite3.Error:
+                return func(*args, **kwargs)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            try:
+                cache.set(key, name, dataset_version, value, ttl)
+            except sqlite3.Error:
+                pass
+            return value
+        return wrapper
+    return decorator
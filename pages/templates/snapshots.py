@@ -0,0 +1,193 @@
+import os, fcntl, shutil, tempfile, time
+from contextlib import contextmanager
+
+SNAPSHOT_ROOT = "csv_snapshots"
+CURRENT_FILE = os.path.join(SNAPSHOT_ROOT, "CURRENT")
+LEASE_ROOT = os.path.join(SNAPSHOT_ROOT, ".leases")
+PUBLISH_LOCK_FILE = os.path.join(SNAPSHOT_ROOT, ".publish.lock")
+LEASE_TTL_SECONDS = 15 * 60
+
+
+class NothingToPublish(Exception):
+    """
+    Raised by a publish_snapshot update callback that made no changes, so the
+    staging directory is discarded instead of published.
+    """
+
+
+def current_snapshot():
+    """
+    Returns the name of the snapshot the CURRENT pointer refers to, or None if
+    nothing has been published yet.
+    """
+    try:
+        with open(CURRENT_FILE) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def snapshot_path(version):
+    return os.path.join(SNAPSHOT_ROOT, version)
+
+
+def list_snapshots():
+    if not os.path.isdir(SNAPSHOT_ROOT):
+        return []
+    return sorted(name for name in os.listdir(SNAPSHOT_ROOT) if name.startswith("v") and
+                  os.path.isdir(snapshot_path(name)))
+
+
+def _next_version():
+    existing = [int(name[1:]) for name in list_snapshots() if name[1:].isdigit()]
+    return f"v{max(existing, default=0) + 1:06d}"
+
+
+def _swap_current(version):
+    tmp_path = f"{CURRENT_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, CURRENT_FILE)
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+@contextmanager
+def _publish_lock(blocking=True):
+    """
+    Holds the exclusive lock serializing publishers (and garbage collection)
+    across processes. Yields False instead of waiting when blocking is False
+    and another process holds it.
+    """
+    os.makedirs(SNAPSHOT_ROOT, exist_ok=True)
+    with open(PUBLISH_LOCK_FILE, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def publish_snapshot(update, base_dir):
+    """
+    Publishes a new snapshot. The files of the current snapshot are hard-linked
+    into a staging directory (the first snapshot copies base_dir instead, since
+    its files can still be rewritten in place), update(staging_dir) writes the
+    changes, and the CURRENT pointer is swapped in one rename.
+
+    update must replace files (e.g. write a temporary file and os.replace it)
+    rather than modify them in place, because unchanged files share their inode
+    with the previous snapshot. If update raises NothingToPublish, nothing is
+    published and None is returned. Concurrent publishers take turns, so each
+    one stages from the snapshot the previous one published.
+    """
+    with _publish_lock():
+        version = _publish_locked(update, base_dir)
+        if version is not None:
+            _collect_garbage_locked()
+    return version
+
+
+def _publish_locked(update, base_dir):
+    current = current_snapshot()
+    staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=SNAPSHOT_ROOT)
+    try:
+        if current:
+            shutil.copytree(snapshot_path(current), staging_dir, copy_function=_link_or_copy, dirs_exist_ok=True)
+        else:
+            shutil.copytree(base_dir, staging_dir, ignore=shutil.ignore_patterns(".*"), dirs_exist_ok=True)
+        update(staging_dir)
+        version = _next_version()
+        os.rename(staging_dir, snapshot_path(version))
+    except NothingToPublish:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return None
+    except Exception:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    _swap_current(version)
+    return version
+
+
+def _lease_path(version, reader_id):
+    return os.path.join(LEASE_ROOT, version, reader_id)
+
+
+def release_snapshot(version, reader_id):
+    try:
+        os.remove(_lease_path(version, reader_id))
+    except FileNotFoundError:
+        pass
+
+
+def pin_snapshot(reader_id, previous=None):
+    """
+    Pins the current snapshot for reader_id by touching a lease file and returns
+    its name. A lease held on an older snapshot by the same reader is released,
+    after which that snapshot is collected if nobody else reads it.
+    Returns None when no snapshot has been published.
+    """
+    while True:
+        version = current_snapshot()
+        if version is None:
+            return None
+        lease = _lease_path(version, reader_id)
+        os.makedirs(os.path.dirname(lease), exist_ok=True)
+        with open(lease, "a"):
+            os.utime(lease)
+        # The snapshot may have been collected between reading CURRENT and taking the lease
+        if os.path.isdir(snapshot_path(version)):
+            break
+        release_snapshot(version, reader_id)
+    if previous and previous != version:
+        release_snapshot(previous, reader_id)
+        collect_garbage()
+    return version
+
+
+def live_readers(version):
+    lease_dir = os.path.join(LEASE_ROOT, version)
+    if not os.path.isdir(lease_dir):
+        return 0
+    cutoff = time.time() - LEASE_TTL_SECONDS
+    readers = 0
+    for name in os.listdir(lease_dir):
+        try:
+            if os.path.getmtime(os.path.join(lease_dir, name)) >= cutoff:
+                readers += 1
+        except FileNotFoundError:
+            pass
+    return readers
+
+
+def collect_garbage():
+    """
+    Deletes every snapshot other than the current one that has no live readers.
+    Leases that have not been touched for LEASE_TTL_SECONDS count as gone.
+    Skipped while a publish is in progress, since the publisher collects
+    garbage itself once its snapshot is current.
+    """
+    if not os.path.isdir(SNAPSHOT_ROOT):
+        return []
+    with _publish_lock(blocking=False) as locked:
+        return _collect_garbage_locked() if locked else []
+
+
+def _collect_garbage_locked():
+    current = current_snapshot()
+    removed = []
+    for version in list_snapshots():
+        if version != current and live_readers(version) == 0:
+            shutil.rmtree(snapshot_path(version), ignore_errors=True)
+            shutil.rmtree(os.path.join(LEASE_ROOT, version), ignore_errors=True)
+            removed.append(version)
+    return removed
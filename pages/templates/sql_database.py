@@ -0,0 +1,108 @@
+import time
+import uuid
+import sqlite3
+import numpy as np
+import pandas as pd
+import streamlit as st
+from pages.templates.dataset import data_dir
+from pages.templates.gpa_stats import (CLASS_LEVELS, GENDERS, GPA_GROUPS, GPA_MIDPOINTS, COUNT_COLUMNS,
+                                       list_report_files, load_count_arrays)
+from pages.templates.grade_data import load_grade_data, grade_data_path
+
+GPA_TABLES = {"gpaDistribution": "gpa_distribution", "cumulativeGPA": "cumulative_gpa"}
+INDEXES = {
+    "grades": [["year", "term"], ["subject"], ["course_id"], ["instructor"]],
+    "gpa_distribution": [["year", "semester"], ["college"], ["class_level", "gender"]],
+    "cumulative_gpa": [["year", "semester"], ["college"], ["class_level", "gender"]],
+}
+QUERY_TIMEOUT_SECONDS = 10
+MAX_ROWS = 5000
+# Statement kinds a workbench query may run; everything else (writes, ATTACH, PRAGMA, ...) is denied
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+
+class SharedDatabase:
+    """
+    A shared-cache in-memory SQLite database. conn keeps it alive for as long
+    as this object is referenced; uri opens further connections to it.
+    """
+    def __init__(self, dataset_version):
+        # A unique name per build, so a rebuild never meets a not yet freed earlier copy
+        self.uri = f"file:tamu_{dataset_version}_{uuid.uuid4().hex}?mode=memory&cache=shared"
+        self.conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+
+def gpa_long_table(file_info, counts):
+    """
+    Flattens the (files, GPA groups, COUNT_COLUMNS) counts into one row per
+    file, GPA group, class level and gender.
+    """
+    columns = [COUNT_COLUMNS.index(f'{level} {gender}') for level in CLASS_LEVELS for gender in GENDERS]
+    students = counts[..., columns]
+    file_ids, group_ids, cell_ids = np.indices(students.shape).reshape(3, -1)
+    return pd.DataFrame({
+        "year": np.array([int(info["year"]) for info in file_info])[file_ids],
+        "semester": np.array([info["semester"] for info in file_info])[file_ids],
+        "college": np.array([info["college"] for info in file_info])[file_ids],
+        "gpa_group": np.array(GPA_GROUPS)[group_ids],
+        "gpa_midpoint": GPA_MIDPOINTS[group_ids],
+        "class_level": np.repeat(CLASS_LEVELS, len(GENDERS))[cell_ids],
+        "gender": np.tile(GENDERS, len(CLASS_LEVELS))[cell_ids],
+        "students": students.reshape(-1),
+    })
+
+
+@st.cache_resource(max_entries=2, show_spinner="Building the SQL database...")
+def load_database(dataset_version):
+    """
+    Builds a SharedDatabase with the grade distribution and both GPA reports.
+    Run queries through run_query, which opens its own read-only connection.
+    Two versions are kept so sessions still pinned to the previous dataset do
+    not force a rebuild.
+    """
+    database = SharedDatabase(dataset_version)
+    conn = database.conn
+    grades = load_grade_data(grade_data_path(dataset_version), dataset_version)
+    course_ids = grades["course"].str.replace(r'-[^-]*$', '', regex=True)
+    grades = grades.assign(subject=course_ids.str.replace(r'-.*$', '', regex=True), course_id=course_ids)
+    grades.to_sql("grades", conn, index=False, chunksize=50_000)
+
+    for report, table in GPA_TABLES.items():
+        file_info = list_report_files(data_dir(report, dataset_version))
+        counts = load_count_arrays(tuple(info["file_path"] for info in file_info), dataset_version)
+        gpa_long_table(file_info, counts).to_sql(table, conn, index=False, chunksize=50_000)
+
+    for table, indexes in INDEXES.items():
+        for columns in indexes:
+            conn.execute(f"CREATE INDEX idx_{table}_{'_'.join(columns)} ON {table} ({', '.join(columns)})")
+    conn.execute("ANALYZE")
+    conn.commit()
+    return database
+
+
+def table_schemas(conn):
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")
+              if not row[0].startswith("sqlite_")]
+    return {table: [(row[1], row[2]) for row in conn.execute(f"PRAGMA table_info({table})")] for table in tables}
+
+
+def run_query(dataset_version, sql, timeout=QUERY_TIMEOUT_SECONDS, max_rows=MAX_ROWS):
+    """
+    Runs one read-only statement and returns (DataFrame, truncated). Queries are
+    interrupted after timeout seconds and at most max_rows rows are fetched.
+    Raises sqlite3.Error for invalid, denied or interrupted queries.
+    """
+    # Holding database keeps the in-memory database alive even if the cache evicts it mid-query
+    database = load_database(dataset_version)
+    conn = sqlite3.connect(database.uri, uri=True)
+    try:
+        deadline = time.monotonic() + timeout
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, 10_000)
+        conn.set_authorizer(lambda action, *args: sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS
+                            else sqlite3.SQLITE_DENY)
+        cursor = conn.execute(sql)
+        rows = cursor.fetchmany(max_rows + 1)
+        columns = [column[0] for column in cursor.description or []]
+    finally:
+        conn.close()
+    return pd.DataFrame(rows[:max_rows], columns=columns), len(rows) > max_rows
@@ -0,0 +1,389 @@
+import os, json, gzip, time, hashlib, argparse, threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+import numpy as np
+import pandas as pd
+import tornado.ioloop
+import tornado.web
+from pages.templates.dataset import BASE_VERSION, DATA_ROOT, data_dir
+from pages.templates.snapshots import pin_snapshot, release_snapshot, collect_garbage, snapshot_path
+from pages.templates.gpa_stats import list_report_files, gpa_summary, hypothesis_tests
+from pages.templates.grade_data import (load_grade_data, filter_positions, grade_data_path, sort_positions, summer_mask,
+                                        course_mask)
+from pages.templates.instructor_index import load_instructor_index, normalize_instructor
+from pages.templates.percentiles import load_percentile_tables, PERCENTILE_LEVELS, PERCENTILE_GENDERS
+from pages.templates.export import EXPORT_FORMATS, iter_export, row_chunks, gpa_table_chunks
+
+# Run from the repository root with: python -m scripts.api_server [--port 8600]
+
+# GLOBALS
+REPORTS = ["gpaDistribution", "cumulativeGPA"]
+RESPONSE_CACHE_ENTRIES = 4096
+COMPUTE_WORKERS = 4
+MAX_COURSE_ROWS = 1000
+MAX_INSTRUCTORS = 20
+CACHE_MAX_AGE = 60
+EXCLUDE_SUMMER_DEFAULT = "1"  # Matches the grade distribution page
+PIN_INTERVAL_SECONDS = 1.0
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def to_jsonable(value):
+    """
+    Converts numpy scalars, NaN and DataFrames into plain JSON values.
+    """
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient="index"))
+    if isinstance(value, np.ndarray):
+        return to_jsonable(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+
+_pin_lock = threading.Lock()
+_pinned = {"version": None, "checked": 0.0}
+_in_flight = Counter()
+
+
+def _reader_id():
+    return f"api-{os.getpid()}"
+
+
+def acquire_dataset_version():
+    """
+    Returns the dataset version a request should read and counts the request
+    against it. The process keeps a lease on every version that is current or
+    still has requests in flight, so a snapshot is never collected while a
+    request (e.g. a long export) is reading it. CURRENT is re-read at most once
+    per PIN_INTERVAL_SECONDS to keep requests cheap.
+    """
+    with _pin_lock:
+        now = time.monotonic()
+        if now - _pinned["checked"] >= PIN_INTERVAL_SECONDS:
+            previous, _pinned["version"] = _pinned["version"], pin_snapshot(_reader_id())
+            _pinned["checked"] = now
+            if previous and previous != _pinned["version"] and not _in_flight[previous]:
+                _release(previous)
+        version = _pinned["version"] or BASE_VERSION
+        _in_flight[version] += 1
+        return version
+
+
+def release_dataset_version(version):
+    # Drops the lease on a superseded version once its last request has finished
+    with _pin_lock:
+        _in_flight[version] -= 1
+        if not _in_flight[version]:
+            del _in_flight[version]
+            if version not in (_pinned["version"], BASE_VERSION):
+                _release(version)
+
+
+def _release(version):
+    release_snapshot(version, _reader_id())
+    collect_garbage()
+
+
+def dataset_last_modified(dataset_version):
+    return os.path.getmtime(DATA_ROOT if dataset_version == BASE_VERSION else snapshot_path(dataset_version))
+
+
+def catalog(dataset_version, query):
+    reports = {}
+    for report in REPORTS:
+        files = sorted(list_report_files(data_dir(report, dataset_version)),
+                       key=lambda info: (info["year"], info["semester"], info["college"]))
+        reports[report] = [{key: info[key] for key in ["year", "semester", "college"]} for info in files]
+    return {"reports": reports}
+
+
+def find_report_file(dataset_version, query):
+    report = query.get("report", "gpaDistribution")
+    if report not in REPORTS:
+        raise ApiError(400, f"Unknown report: {report}")
+    wanted = (query.get("year"), str(query.get("semester", "")).upper(),
+              str(query.get("college", "")).replace("_", " ").upper())
+    for info in list_report_files(data_dir(report, dataset_version)):
+        if (info["year"], info["semester"], info["college"].upper()) == wanted:
+            return info
+    raise ApiError(404, "No report file for the given year, semester and college")
+
+
+def gpa_stats(dataset_version, query):
+    info = find_report_file(dataset_version, query)
+    summary = gpa_summary(info["file_path"], dataset_version)
+    tests = hypothesis_tests(info["file_path"], dataset_version)
+    return {
+        "year": info["year"], "semester": info["semester"], "college": info["college"],
+        "summary": {key: value for key, value in summary.items() if key != "gender_gpa"},
+        "gender_gpa": summary["gender_gpa"],
+        "hypothesis_tests": tests["results"],
+    }
+
+
+def percentile(dataset_version, query):
+    info = find_report_file(dataset_version, query)
+    class_level = query.get("class_level", "All").title()
+    gender = query.get("gender", "All").title()
+    if class_level not in PERCENTILE_LEVELS or gender not in PERCENTILE_GENDERS:
+        raise ApiError(400, f"class_level must be one of {PERCENTILE_LEVELS} and gender one of {PERCENTILE_GENDERS}")
+    try:
+        gpa = float(query["gpa"])
+    except (KeyError, ValueError):
+        gpa = None
+    # The range check also rejects nan and inf
+    if gpa is None or not 0.0 <= gpa <= 4.0:
+        raise ApiError(400, "gpa must be a number between 0 and 4")
+    report = query.get("report", "gpaDistribution")
+    value = load_percentile_tables(dataset_version).percentile(
+        report, info["year"], info["semester"], info["college"], gpa, class_level, gender)
+    return {"year": info["year"], "semester": info["semester"], "college": info["college"],
+            "class_level": class_level, "gender": gender, "gpa": gpa, "percentile": value}
+
+
+def excludes_summer(query):
+    return query.get("exclude_summer", EXCLUDE_SUMMER_DEFAULT) not in ("0", "false")
+
+
+def grade_data(dataset_version):
+    path = grade_data_path(dataset_version)
+    if not os.path.exists(path):
+        raise ApiError(503, "Grade distribution data is not available")
+    return load_grade_data(path, dataset_version)
+
+
+def course_search(dataset_version, query):
+    title, course_id = query.get("title", ""), query.get("id", "")
+    if not title and not course_id:
+        raise ApiError(400, "Give a course title (title=CSCE) and/or a course id (id=120)")
+    df = grade_data(dataset_version)
+    exclude_summer = excludes_summer(query)
+    positions = filter_positions(df, dataset_version, exclude_summer, title, course_id)
+    try:
+        limit = min(int(query.get("limit", MAX_COURSE_ROWS)), MAX_COURSE_ROWS)
+    except ValueError:
+        raise ApiError(400, "limit must be an integer")
+    rows = df.iloc[positions[:limit]]
+    return {"total": int(len(positions)), "returned": int(len(rows)),
+            "rows": json.loads(rows.to_json(orient="records"))}
+
+
+def instructor_rollup(dataset_version, query):
+    if not query.get("q"):
+        raise ApiError(400, "Give an instructor name (q=SMITH)")
+    df = grade_data(dataset_version)
+    index = load_instructor_index(df, dataset_version)
+    name_ids = index.lookup(query["q"])
+    instructors = []
+    for name_id in name_ids[:MAX_INSTRUCTORS]:
+        positions = instructor_positions(df, index, [name_id], excludes_summer(query))
+        rows = df[["course", "year", "term", "gpa"]].iloc[positions]
+        history = rows.groupby(["year", "term"], sort=False)["gpa"].agg(["mean", "count"]).reset_index()
+        instructors.append({
+            "instructor": index.display_names[name_id],
+            "sections": int(len(rows)),
+            "average_gpa": float(rows["gpa"].mean()) if len(rows) else None,
+            "courses": sorted(rows["course"].str.replace(r'-[^-]*$', '', regex=True).unique().tolist()),
+            "history": json.loads(history.rename(columns={"mean": "average_gpa", "count": "sections"})
+                                  .to_json(orient="records")),
+        })
+    return {"matches": len(name_ids), "instructors": instructors}
+
+
+def instructor_positions(df, index, name_ids, exclude_summer):
+    positions = index.rows(name_ids)
+    if exclude_summer:
+        positions = positions[~summer_mask(df['term'].take(positions))]
+    return sort_positions(df, positions, 'course')
+
+
+def course_export_frames(dataset_version, query):
+    df = grade_data(dataset_version)
+    title, course_id, instructor = query.get("title", ""), query.get("id", ""), query.get("instructor", "")
+    exclude_summer = excludes_summer(query)
+    if instructor:
+        # An exact (normalized) instructor name, as shown by /api/instructors
+        index = load_instructor_index(df, dataset_version)
+        name = normalize_instructor(instructor)
+        positions = instructor_positions(df, index, [i for i in index.lookup(name) if index.names[i] == name],
+                                         exclude_summer)
+        return row_chunks(df, positions[course_mask(df["course"].take(positions), title, course_id)])
+    # With no filters every row is exported in file order, without building a position array
+    if not (title or course_id or exclude_summer):
+        return row_chunks(df)
+    return row_chunks(df, filter_positions(df, dataset_version, exclude_summer, title, course_id))
+
+
+def gpa_export_frames(dataset_version, query):
+    report = query.get("report", "gpaDistribution")
+    if report not in REPORTS:
+        raise ApiError(400, f"Unknown report: {report}")
+    file_info = list_report_files(data_dir(report, dataset_version))
+    if query.get("year"):
+        file_info = [info for info in file_info if info["year"] == query["year"]]
+    if query.get("semester"):
+        file_info = [info for info in file_info if info["semester"] == query["semester"].upper()]
+    return gpa_table_chunks(file_info)
+
+
+EXPORTS = {"courses": course_export_frames, "gpa": gpa_export_frames}
+
+
+class ResponseCache:
+    """
+    LRU cache of encoded responses keyed by (dataset version, endpoint, query).
+    Bodies are stored both plain and gzipped so hits need no re-encoding.
+    """
+    def __init__(self, max_entries=RESPONSE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class VersionedHandler(tornado.web.RequestHandler):
+    """
+    Holds the dataset version a request reads from prepare() until the
+    response is finished.
+    """
+    dataset_version = None
+
+    def prepare(self):
+        self.dataset_version = acquire_dataset_version()
+
+    def on_finish(self):
+        if self.dataset_version is not None:
+            release_dataset_version(self.dataset_version)
+            self.dataset_version = None
+
+
+class JsonHandler(VersionedHandler):
+    def initialize(self, compute, cache, executor):
+        self.compute = compute
+        self.cache = cache
+        self.executor = executor
+
+    async def get(self):
+        dataset_version = self.dataset_version
+        query = {key: self.get_query_argument(key) for key in sorted(self.request.query_arguments)}
+        key = (dataset_version, self.request.path, tuple(query.items()))
+        etag = '"' + hashlib.sha1(repr(key).encode()).hexdigest() + '"'
+
+        self.set_header("Etag", etag)
+        self.set_header("Last-Modified", formatdate(dataset_last_modified(dataset_version), usegmt=True))
+        self.set_header("Cache-Control", f"public, max-age={CACHE_MAX_AGE}")
+        self.set_header("Vary", "Accept-Encoding")
+        if self.check_etag_header():
+            self.set_status(304)
+            return
+
+        entry = self.cache.get(key)
+        if entry is None:
+            try:
+                payload = await tornado.ioloop.IOLoop.current().run_in_executor(
+                    self.executor, self.compute, dataset_version, query)
+            except ApiError as e:
+                self.set_status(e.status)
+                self.clear_header("Etag")
+                self.set_header("Cache-Control", "no-store")
+                self.finish({"error": str(e)})
+                return
+            body = json.dumps({"dataset_version": dataset_version, **to_jsonable(payload)}).encode()
+            entry = (body, gzip.compress(body, compresslevel=6))
+            self.cache.put(key, entry)
+
+        body, gzipped = entry
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+        if "gzip" in self.request.headers.get("Accept-Encoding", ""):
+            self.set_header("Content-Encoding", "gzip")
+            self.finish(gzipped)
+        else:
+            self.finish(body)
+
+    def compute_etag(self):
+        # The version-based Etag set in get() is used instead of hashing the body
+        return None
+
+
+class ExportHandler(VersionedHandler):
+    """
+    Streams an export chunk by chunk, flushing each one before the next is
+    serialized, so memory stays flat however many rows are exported.
+    """
+    def initialize(self, executor):
+        self.executor = executor
+
+    async def get(self, dataset, export_format):
+        dataset_version = self.dataset_version
+        query = {key: self.get_query_argument(key) for key in self.request.query_arguments}
+        loop = tornado.ioloop.IOLoop.current()
+        try:
+            frames = await loop.run_in_executor(self.executor, EXPORTS[dataset], dataset_version, query)
+        except ApiError as e:
+            self.set_status(e.status)
+            self.finish({"error": str(e)})
+            return
+
+        self.set_header("Content-Type", EXPORT_FORMATS[export_format])
+        self.set_header("Content-Disposition", f'attachment; filename="{dataset}_{dataset_version}.{export_format}"')
+        self.set_header("Cache-Control", "no-store")
+        chunks = iter_export(frames, export_format)
+        while True:
+            chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+            if chunk is None:
+                break
+            self.write(chunk)
+            await self.flush()
+        self.finish()
+
+
+def make_app():
+    cache = ResponseCache()
+    executor = ThreadPoolExecutor(max_workers=COMPUTE_WORKERS, thread_name_prefix="api")
+    routes = [
+        ("/api/catalog", catalog),
+        ("/api/gpa", gpa_stats),
+        ("/api/percentile", percentile),
+        ("/api/courses", course_search),
+        ("/api/instructors", instructor_rollup),
+    ]
+    export_path = rf"/api/export/({'|'.join(EXPORTS)})\.({'|'.join(EXPORT_FORMATS)})"
+    return tornado.web.Application([
+        (path, JsonHandler, {"compute": compute, "cache": cache, "executor": executor}) for path, compute in routes
+    ] + [(export_path, ExportHandler, {"executor": executor})])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="JSON API over the TAMU Statistics data")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--address", default="127.0.0.1")
+    args = parser.parse_args()
+    make_app().listen(args.port, address=args.address)
+    print(f"Serving the API on http://{args.address}:{args.port}/api/catalog")
+    tornado.ioloop.IOLoop.current().start()
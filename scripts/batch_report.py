@@ -0,0 +1,95 @@
+import os, json, time, argparse, datetime
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from pages.templates.dataset import BASE_VERSION, data_dir
+from pages.templates.snapshots import pin_snapshot, release_snapshot
+from pages.templates.gpa_stats import (list_report_files, read_counts, batch_statistics, term_sort_key, align_reports,
+                                       distribution_deltas)
+
+# Run from the repository root with: python -m scripts.batch_report [--output gpa_report.json]
+
+# GLOBALS
+REPORTS = ["gpaDistribution", "cumulativeGPA"]
+DEFAULT_OUTPUT = "gpa_report.json"
+
+
+def json_safe(value):
+    """
+    Replaces NaN statistics of empty reports with None, recursing into nested
+    dicts, so the report stays valid JSON.
+    """
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def process_chunk(file_infos):
+    """
+    Reads a chunk of report files and computes their statistics in one
+    vectorized pass. Runs in a worker process.
+    """
+    counts = np.stack([read_counts(info["file_path"]) for info in file_infos])
+    return [json_safe({"year": info["year"], "semester": info["semester"], "college": info["college"],
+                       "file": os.path.basename(info["file_path"]), **stats})
+            for info, stats in zip(file_infos, batch_statistics(counts))]
+
+
+def process_delta_chunk(pairs):
+    """
+    Reads a chunk of aligned term and cumulative report files and computes
+    their deltas in one vectorized pass. Runs in a worker process.
+    """
+    term_counts = np.stack([read_counts(term["file_path"]) for term, _ in pairs])
+    cumulative_counts = np.stack([read_counts(cumulative["file_path"]) for _, cumulative in pairs])
+    labels = [(term["year"], term["semester"], term["college"]) for term, _ in pairs]
+    deltas = distribution_deltas(term_counts, cumulative_counts, labels)
+    return [json_safe({"year": year, "semester": semester, "college": college,
+                       **{column: float(value) for column, value in row.items()}})
+            for (year, semester, college), row in deltas.iterrows()]
+
+
+def chunked(items, chunks):
+    size = max(1, -(-len(items) // chunks))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def build_report(dataset_version, workers):
+    report = {"generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+              "dataset_version": dataset_version, "reports": {}}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for report_name in REPORTS:
+            file_infos = sorted(list_report_files(data_dir(report_name, dataset_version)),
+                                key=lambda info: (term_sort_key(info), info["college"]))
+            # A few chunks per worker keeps the pool busy without paying per-file overhead
+            results = pool.map(process_chunk, chunked(file_infos, workers * 4))
+            report["reports"][report_name] = [entry for chunk in results for entry in chunk]
+        pairs = align_reports(list_report_files(data_dir("gpaDistribution", dataset_version)),
+                              list_report_files(data_dir("cumulativeGPA", dataset_version)))
+        results = pool.map(process_delta_chunk, chunked(pairs, workers * 4))
+        report["term_vs_cumulative"] = [entry for chunk in results for entry in chunk]
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compute the GPA statistics for every report file")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    start_time = time.time()
+    reader_id = f"batch-{os.getpid()}"
+    version = pin_snapshot(reader_id)
+    try:
+        report = build_report(version or BASE_VERSION, args.workers)
+    finally:
+        if version:
+            release_snapshot(version, reader_id)
+
+    tmp_path = f"{args.output}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, indent=1, allow_nan=False)
+    os.replace(tmp_path, args.output)
+    files = sum(len(entries) for entries in report["reports"].values())
+    print(f"Wrote statistics for {files} files to {args.output} in {round(time.time() - start_time, 2)} seconds")
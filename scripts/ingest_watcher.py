@@ -0,0 +1,164 @@
+import os, time, threading
+import pandas as pd
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from scripts import extract_pdf_gpaDistribution as gpa_extractor
+from scripts import extract_pdf_gradeDistribution as grade_extractor
+from pages.templates.dataset import DATA_ROOT, write_csv_atomic
+from pages.templates.snapshots import publish_snapshot, NothingToPublish
+
+# Run from the repository root with: python -m scripts.ingest_watcher
+
+# GLOBALS
+PDF_ROOT = "pdf_downloads"
+GPA_REPORTS = ["gpaDistribution", "cumulativeGPA"]
+GRADE_REPORT = "gradeDistribution"
+COMBINED_GRADE_FILE = "combined_grade_distribution.csv"
+SETTLE_SECONDS = 2.0
+POLL_SECONDS = 0.5
+
+
+class PdfEventHandler(FileSystemEventHandler):
+    """
+    Records created, modified and moved PDFs. Files are only ingested once they
+    have stopped changing for SETTLE_SECONDS, so a download still in progress is
+    not extracted.
+    """
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def _record(self, path):
+        if path.endswith(".pdf"):
+            with self.lock:
+                self.pending[path] = time.time()
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._record(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._record(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._record(event.dest_path)
+
+    def pop_settled(self):
+        now = time.time()
+        with self.lock:
+            settled = [path for path, seen in self.pending.items() if now - seen >= SETTLE_SECONDS]
+            for path in settled:
+                del self.pending[path]
+        return settled
+
+    def requeue(self, paths):
+        # Retried once they have settled again; newer events for a path take precedence
+        now = time.time()
+        with self.lock:
+            for path in paths:
+                self.pending.setdefault(path, now)
+
+
+def ingest_gpa_pdf(pdf_path, report, data_root):
+    extracted_text = gpa_extractor.extract_text_from_pdf(pdf_path)
+    cleaned_text = gpa_extractor.clean_extracted_text(extracted_text)
+    data_frame = gpa_extractor.create_data_tables(cleaned_text)
+    if data_frame.empty:
+        print(f"No GPA rows found in {pdf_path}, skipping")
+        return False
+
+    csv_directory = os.path.join(data_root, report)
+    os.makedirs(csv_directory, exist_ok=True)
+    csv_file_path = os.path.join(csv_directory, os.path.basename(pdf_path).replace(".pdf", ".csv"))
+    write_csv_atomic(data_frame, csv_file_path)
+    print(f"Data extracted, cleaned, and saved to {csv_file_path}")
+    return True
+
+
+def ingest_grade_pdf(pdf_path, data_root):
+    extracted_text = grade_extractor.extract_text_from_pdf(pdf_path)
+    df = pd.DataFrame(grade_extractor.extract_course_data(extracted_text))
+    if df.empty:
+        print(f"No course rows found in {pdf_path}, skipping")
+        return False
+
+    year, semester = os.path.basename(pdf_path).split("_")[:2]
+    df["year"] = int(year)
+    df["term"] = semester.title()
+
+    csv_directory = os.path.join(data_root, GRADE_REPORT)
+    os.makedirs(csv_directory, exist_ok=True)
+    csv_file_path = os.path.join(csv_directory, os.path.basename(pdf_path).replace(".pdf", ".csv"))
+    write_csv_atomic(df.drop(columns=["year", "term"]), csv_file_path)
+
+    # Replace the rows this report contributed before, then append the new ones
+    combined_file_path = os.path.join(csv_directory, COMBINED_GRADE_FILE)
+    if os.path.exists(combined_file_path):
+        combined = pd.read_csv(combined_file_path)
+        new_keys = pd.MultiIndex.from_frame(df[["year", "term", "course"]])
+        old_keys = pd.MultiIndex.from_frame(combined[["year", "term", "course"]])
+        combined = pd.concat([combined[~old_keys.isin(new_keys)], df], ignore_index=True)
+    else:
+        combined = df
+    write_csv_atomic(combined, combined_file_path)
+    print(f"Merged {len(df)} sections into {combined_file_path}")
+    return True
+
+
+def ingest_pdf(pdf_path, data_root):
+    report = os.path.basename(os.path.dirname(pdf_path))
+    if not os.path.exists(pdf_path):
+        return False
+    try:
+        if report in GPA_REPORTS:
+            return ingest_gpa_pdf(pdf_path, report, data_root)
+        if report == GRADE_REPORT:
+            return ingest_grade_pdf(pdf_path, data_root)
+        print(f"Unknown report directory for {pdf_path}, skipping")
+    except Exception as e:
+        print(f"Error processing {pdf_path}: {e}")
+    return False
+
+
+def ingest_settled(settled, staging_dir, changed):
+    # Publishing a snapshot identical to the current one would invalidate every cache for nothing
+    changed.extend(path for path in settled if ingest_pdf(path, staging_dir))
+    if not changed:
+        raise NothingToPublish()
+
+
+def watch(pdf_root=PDF_ROOT):
+    os.makedirs(pdf_root, exist_ok=True)
+    handler = PdfEventHandler()
+    observer = Observer()
+    observer.schedule(handler, pdf_root, recursive=True)
+    observer.start()
+    print(f"Watching {pdf_root} for new or changed PDFs")
+    try:
+        while True:
+            settled = handler.pop_settled()
+            if settled:
+                changed = []
+                try:
+                    version = publish_snapshot(lambda staging_dir: ingest_settled(settled, staging_dir, changed),
+                                               DATA_ROOT)
+                except Exception as e:
+                    print(f"Error publishing a snapshot for {len(settled)} file(s), will retry: {e}")
+                    handler.requeue(settled)
+                else:
+                    if version is None:
+                        print("Nothing ingested, keeping the current snapshot")
+                    else:
+                        print(f"Ingested {len(changed)} file(s), published snapshot {version}")
+            time.sleep(POLL_SECONDS)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        observer.stop()
+        observer.join()
+
+
+if __name__ == '__main__':
+    watch()
@@ -0,0 +1,305 @@
+import os, sys, json, time, random, asyncio, argparse, subprocess, urllib.request
+import numpy as np
+from tornado.httpclient import HTTPRequest
+from tornado.websocket import websocket_connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.NumberInput_pb2 import NumberInput
+
+# Run from the repository root with: python -m scripts.load_test [--sessions 1 4 8] [--iterations 5]
+
+# GLOBALS
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+DEFAULT_PORT = 8650
+STARTUP_TIMEOUT = 60
+RERUN_TIMEOUT = 120
+COURSE_QUERIES = [("CSCE", ""), ("CSCE", "12"), ("MATH", "251"), ("HIST", ""), ("ENGR", "1"), ("", "120")]
+INSTRUCTOR_QUERIES = ["SMITH", "JONES A", "LEE", "PROF1", "PROF42"]
+GPA_PAGES = {"gpa": "gpa_distribution_app", "cumulative": "cumulative_gpa_app"}
+FINISHED = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_WITH_COMPILE_ERROR}
+
+
+class Session:
+    """
+    One simulated browser tab: talks to the app over Streamlit's websocket the
+    way the frontend does, sending widget values and timing each rerun until
+    the server reports the script finished.
+    """
+    def __init__(self, url, recorder):
+        self.url = url
+        self.recorder = recorder
+        self.pages = {}
+        self.page_hash = ""
+        self.elements = []
+        self.widget_values = {}
+        self.message_cache = {}
+
+    async def connect(self):
+        ws_url = self.url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.ws = await websocket_connect(HTTPRequest(ws_url), subprotocols=["streamlit"],
+                                          max_message_size=512 * 2 ** 20)
+
+    def close(self):
+        self.ws.close()
+
+    async def rerun(self, step):
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = self.page_hash
+        for widget_id, (field, value) in self.widget_values.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            if isinstance(value, list):
+                getattr(state, field).data.extend(value)
+            else:
+                setattr(state, field, value)
+
+        start = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        self.elements, error = [], None
+        while True:
+            data = await asyncio.wait_for(self.ws.read_message(), RERUN_TIMEOUT)
+            if data is None:
+                raise ConnectionError("The server closed the connection")
+            fwd = ForwardMsg.FromString(data)
+            # Large messages the session has seen before arrive as a reference to the earlier copy
+            if fwd.ref_hash:
+                fwd = self.message_cache[fwd.ref_hash]
+            elif fwd.hash:
+                self.message_cache[fwd.hash] = fwd
+
+            kind = fwd.WhichOneof("type")
+            if kind == "new_session":
+                self.pages = {page.url_pathname: page.page_script_hash for page in fwd.new_session.app_pages}
+                self.page_hash = fwd.new_session.page_script_hash
+            elif kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element_type = fwd.delta.new_element.WhichOneof("type")
+                element = getattr(fwd.delta.new_element, element_type)
+                self.elements.append((element_type, element))
+                if element_type == "exception":
+                    error = f"{element.type}: {element.message}"
+            elif kind == "script_finished" and fwd.script_finished in FINISHED:
+                break
+        self.recorder.record(step, time.perf_counter() - start, error)
+
+    async def open_page(self, step, page_name):
+        # Widgets keep their values when the same page is opened again, as in the browser
+        if self.pages[page_name] != self.page_hash:
+            self.widget_values = {}
+        self.page_hash = self.pages[page_name]
+        await self.rerun(step)
+
+    def widget(self, element_type, label):
+        for kind, element in self.elements:
+            if kind == element_type and element.label.startswith(label):
+                return element
+        raise LookupError(f"No {element_type} labelled {label!r} on the page")
+
+    async def set(self, step, element_type, label, value):
+        """
+        Changes a widget the way a user would and waits for the rerun. value is
+        the option label for selectboxes and radios.
+        """
+        try:
+            element = self.widget(element_type, label)
+        except LookupError as e:
+            self.recorder.record(step, None, str(e))
+            return
+        if element_type in ("selectbox", "radio"):
+            state = ("int_value", list(element.options).index(value))
+        elif element_type == "number_input":
+            value = min(value, element.max) if element.has_max else value
+            state = ("int_value", int(value)) if element.data_type == NumberInput.INT else ("double_value", value)
+        elif element_type == "checkbox":
+            state = ("bool_value", value)
+        elif element_type == "slider":
+            state = ("double_array_value", [float(value)])
+        else:
+            state = ("string_value", value)
+        self.widget_values[element.id] = state
+        await self.rerun(step)
+
+    def options(self, element_type, label):
+        return list(self.widget(element_type, label).options)
+
+
+async def grade_course_scenario(session, rng):
+    title, course_id = rng.choice(COURSE_QUERIES)
+    await session.open_page("grade: open page", "grade_distribution")
+    await session.set("grade: course mode", "radio", "Search by", "Course")
+    await session.set("grade: course title", "text_input", "Search by Course Title", title)
+    await session.set("grade: course id", "text_input", "Search by Course ID", course_id)
+    await session.set("grade: sort results", "selectbox", "Sort by", "Average GPA")
+    await session.set("grade: next page", "number_input", "Page", 2)
+
+
+async def grade_instructor_scenario(session, rng):
+    await session.open_page("grade: open page", "grade_distribution")
+    await session.set("grade: instructor mode", "radio", "Search by", "Instructor")
+    await session.set("grade: instructor name", "text_input", "Search by Instructor", rng.choice(INSTRUCTOR_QUERIES))
+
+
+def gpa_scenario(name, page_name):
+    async def scenario(session, rng):
+        await session.open_page(f"{name}: open page", page_name)
+        await session.set(f"{name}: single term view", "radio", "View", "Single Term")
+        await session.set(f"{name}: choose year", "selectbox", "Choose Year",
+                          rng.choice(session.options("selectbox", "Choose Year")))
+        await session.set(f"{name}: choose college", "selectbox", "Choose College",
+                          rng.choice(session.options("selectbox", "Choose College")))
+        await session.set(f"{name}: trend view", "radio", "View", "Trend Across Terms")
+        await session.set(f"{name}: compare view", "radio", "View", "Compare Colleges")
+    return scenario
+
+
+SCENARIOS = [grade_course_scenario, grade_instructor_scenario] + [gpa_scenario(name, page)
+                                                                   for name, page in GPA_PAGES.items()]
+
+
+class Recorder:
+    def __init__(self):
+        self.timings = []
+        self.errors = []
+
+    def record(self, step, seconds, error=None):
+        if seconds is not None:
+            self.timings.append((step, seconds))
+        if error:
+            self.errors.append((step, error))
+
+
+async def run_session(url, session_id, iterations, seed, recorder, think_time, scenarios=None):
+    """
+    Connects one session, then plays the given scenarios (or iterations
+    randomly chosen ones), pausing up to think_time seconds between them.
+    Returns the open session so it stays alive until memory has been measured.
+    """
+    rng = random.Random(seed + session_id)
+    session = Session(url, recorder)
+    await session.connect()
+    await session.rerun("home: open app")
+    for scenario in scenarios or [rng.choice(SCENARIOS) for _ in range(iterations)]:
+        try:
+            await scenario(session, rng)
+        except (LookupError, ConnectionError, asyncio.TimeoutError) as e:
+            recorder.record(scenario.__name__, None, f"{type(e).__name__}: {e}")
+        await asyncio.sleep(rng.uniform(0, think_time))
+    return session
+
+
+def rss_bytes(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+async def run_level(url, server_pid, sessions, iterations, seed, think_time):
+    recorder = Recorder()
+    rss_before = rss_bytes(server_pid) if server_pid else None
+    start = time.perf_counter()
+    open_sessions = await asyncio.gather(*[run_session(url, i, iterations, seed, recorder, think_time)
+                                           for i in range(sessions)])
+    wall_time = time.perf_counter() - start
+    rss_after = rss_bytes(server_pid) if server_pid else None
+    for session in open_sessions:
+        session.close()
+
+    latencies = np.array([seconds for _, seconds in recorder.timings]) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (np.nan,) * 3
+    by_step = {}
+    for step, seconds in recorder.timings:
+        by_step.setdefault(step, []).append(seconds * 1000)
+    return {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "wall_time_s": wall_time,
+        "throughput_reruns_per_s": len(latencies) / wall_time,
+        "p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99),
+        "errors": len(recorder.errors),
+        "error_samples": [f"{step}: {error}" for step, error in recorder.errors[:5]],
+        "memory_per_session_mb": (max(rss_after - rss_before, 0) / sessions / 2 ** 20
+                                  if server_pid else None),
+        "steps": {step: {"count": len(values), "p50_ms": float(np.percentile(values, 50)),
+                         "p95_ms": float(np.percentile(values, 95))} for step, values in sorted(by_step.items())},
+    }
+
+
+def print_level(result, show_steps):
+    memory = result["memory_per_session_mb"]
+    print(f"{result['sessions']:>8} {result['reruns']:>7} {result['throughput_reruns_per_s']:>10.2f} "
+          f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} "
+          f"{'n/a' if memory is None else f'{memory:.1f}':>10} {result['errors']:>6}")
+    for sample in result["error_samples"]:
+        print(f"         error: {sample}")
+    if show_steps:
+        for step, stats in result["steps"].items():
+            print(f"         {step:<28} n={stats['count']:<5} p50={stats['p50_ms']:.1f} ms "
+                  f"p95={stats['p95_ms']:.1f} ms")
+
+
+def start_server(port):
+    server = subprocess.Popen([sys.executable, "-m", "streamlit", "run", APP_PATH,
+                               "--server.headless", "true", "--server.address", "127.0.0.1",
+                               "--server.port", str(port), "--server.fileWatcherType", "none",
+                               "--browser.gatherUsageStats", "false"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"{url}/_stcore/health", timeout=1)
+            return server, url
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.5)
+    server.kill()
+    raise RuntimeError(f"The Streamlit server did not start on port {port}")
+
+
+async def main(args, url, server_pid):
+    # One session through every scenario first, so the shared caches are loaded
+    # before measuring and do not count towards per-session memory
+    warmup = Recorder()
+    session = await run_session(url, 0, len(SCENARIOS), args.seed, warmup, 0, scenarios=SCENARIOS)
+    session.close()
+    print(f"Warm-up done in {sum(seconds for _, seconds in warmup.timings):.1f} s, {len(warmup.errors)} errors")
+    for step, error in warmup.errors[:5]:
+        print(f"         error: {step}: {error}")
+
+    print(f"{'sessions':>8} {'reruns':>7} {'reruns/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'MB/session':>10} {'errors':>6}")
+    results = []
+    for sessions in args.sessions:
+        result = await run_level(url, server_pid, sessions, args.iterations, args.seed, args.think_time)
+        print_level(result, args.steps)
+        results.append(result)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulate concurrent sessions against the Streamlit pages")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 8],
+                        help="concurrent session counts to run, one load level each")
+    parser.add_argument("--iterations", type=int, default=5, help="scenarios played by each session")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="maximum random pause in seconds between scenarios")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="test an already running app instead of starting one (memory is not reported)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--steps", action="store_true", help="also print latency per interaction step")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    server, url = (None, args.url) if args.url else start_server(args.port)
+    try:
+        results = asyncio.run(main(args, url, server.pid if server else None))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
@@ -0,0 +1,45 @@
+import os, sys, shutil
+from pages.templates.dataset import DATA_ROOT
+from pages.templates.snapshots import publish_snapshot, collect_garbage, current_snapshot
+
+# Run from the repository root with:
+#   python -m scripts.publish_snapshot [source_dir]   publish source_dir (default csv_data) as a new snapshot
+#   python -m scripts.publish_snapshot --gc           delete old snapshots that no session is reading
+
+
+def copy_changed_files(source_dir, staging_dir):
+    """
+    Replaces every file in staging_dir whose contents differ from source_dir.
+    Files are copied next to their target and renamed over it, so the hard links
+    shared with the previous snapshot are never written through.
+    """
+    updated = 0
+    for root, _, files in os.walk(source_dir):
+        target_root = os.path.join(staging_dir, os.path.relpath(root, source_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            if name.startswith("."):
+                continue
+            source = os.path.join(root, name)
+            target = os.path.join(target_root, name)
+            if os.path.exists(target) and os.path.samefile(source, target):
+                continue
+            if os.path.exists(target) and os.path.getsize(source) == os.path.getsize(target):
+                with open(source, "rb") as a, open(target, "rb") as b:
+                    if a.read() == b.read():
+                        continue
+            shutil.copy2(source, f"{target}.tmp")
+            os.replace(f"{target}.tmp", target)
+            updated += 1
+    return updated
+
+
+if __name__ == '__main__':
+    if "--gc" in sys.argv[1:]:
+        removed = collect_garbage()
+        print(f"Removed snapshots: {', '.join(removed) if removed else 'none'}")
+    else:
+        source_dir = sys.argv[1] if len(sys.argv) > 1 else DATA_ROOT
+        version = publish_snapshot(lambda staging_dir: print(
+            f"Updated {copy_changed_files(source_dir, staging_dir)} file(s)"), source_dir)
+        print(f"Published {source_dir} as snapshot {version} (current: {current_snapshot()})")